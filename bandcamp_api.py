@@ -1,10 +1,9 @@
 from __future__ import annotations
 
-import json
 from typing import Dict, List, Tuple
 
 from config import resource_path
-from utils import find_ytdlp_cmd, run_quiet
+from utils import find_ytdlp_cmd, json_loads, run_quiet
 
 
 def _find_ytdlp_cmd() -> list[str]:
@@ -86,6 +85,6 @@ class BandcampClient:
         if proc.returncode != 0:
             raise RuntimeError(proc.stderr or "yt-dlp failed on Bandcamp URL")
         try:
-            return json.loads(proc.stdout or "{}")
+            return json_loads(proc.stdout or "{}")
         except Exception as e:
             raise RuntimeError(f"Invalid JSON from yt-dlp: {e}")
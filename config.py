@@ -83,6 +83,14 @@ _DEFAULT = {
     "spotify_client_id": "",
     "spotify_client_secret": ""
 }
+
+
+def user_cache_dir(*parts: str) -> str:
+    """
+    Return a writable per-user cache folder, next to the user config.
+    """
+    return str(Path(CONFIG_FILE).parent.joinpath("cache", *parts))
+
 
 def load_config() -> dict:
     data = dict(_DEFAULT)
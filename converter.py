@@ -16,10 +16,11 @@ from pathlib import Path
 from typing import Callable, Optional, Sequence, List
 from concurrent.futures import ThreadPoolExecutor, as_completed, Future
 from difflib import SequenceMatcher
+from functools import lru_cache
 from urllib.parse import parse_qs, urlsplit, urlunsplit
 from ai_matcher import AIMatchAdvice, build_ai_match_advisor
 from library_manifest import build_manifest, read_manifest, write_manifest
-from utils import build_ytdlp_cookie_args
+from utils import NO_WINDOW_KWARGS, build_ytdlp_cookie_args
 
 log = logging.getLogger(__name__)
 
@@ -43,6 +44,13 @@ _AUDIO_EXTS = {
     "opus", "ogg", "oga", "vorbis", "webm", "mp4", "mka",
 }
 
+# Patterns for _sanitize_filename / _norm_text, compiled once: _norm_text runs
+# for every search candidate of every track.
+_UNSAFE_FILENAME_RE = re.compile(r'[\\/:*?"<>|]')
+_WHITESPACE_RE = re.compile(r"\s+")
+_NORM_SEPARATORS_RE = re.compile(r"[\(\)\[\]\{\}\|_/\\\-]+")
+_NORM_DROP_RE = re.compile(r"[^a-z0-9\s]")
+
 _BAD_VARIANTS = {
     "live",
     "remix",
@@ -93,6 +101,12 @@ def _which(names: Sequence[str]) -> str | None:
     return None
 
 def _find_yt_dlp() -> list[str]:
+    # Callers extend the returned command: hand out a fresh list each time.
+    return list(_resolve_yt_dlp())
+
+@lru_cache(maxsize=1)
+def _resolve_yt_dlp() -> tuple[str, ...]:
+    """Bundled binary, then PATH, then the Python module; checked once per process."""
     rd = _resource_dir()
     candidates = [
         rd / "yt-dlp" / ("yt-dlp.exe" if os.name == "nt" else "yt-dlp"),
@@ -101,13 +115,13 @@ def _find_yt_dlp() -> list[str]:
     ]
     for c in candidates:
         if c.exists():
-            return [str(c)]
+            return (str(c),)
 
     found = _which(["yt-dlp", "yt-dlp.exe"])
     if found:
-        return [found]
+        return (found,)
 
-    return [sys.executable, "-m", "yt_dlp"]
+    return (sys.executable, "-m", "yt_dlp")
 
 def _find_ffmpeg_dir() -> str | None:
     rd = _resource_dir()
@@ -1173,22 +1187,14 @@ class Converter:
         cmd += self._ytdlp_cookie_args
         cmd.append(f"ytsearch{limit}:{query}")
 
-        startupinfo = None
-        creationflags = 0
-        if os.name == "nt":
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            creationflags = getattr(subprocess, "CREATE_NO_WINDOW", 0)
-
         try:
             proc = subprocess.run(
                 cmd,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 text=True,
-                startupinfo=startupinfo,
-                creationflags=creationflags,
                 timeout=self.youtube_search_timeout_s,
+                **NO_WINDOW_KWARGS,
             )
         except FileNotFoundError:
             log.warning("CONV: yt-dlp not found while searching YouTube")
@@ -1424,12 +1430,6 @@ class Converter:
 
     def _convert_wav_to_aiff(self, temp_path: str, final_path: str):
         exe = _ffmpeg_exe()
-        startupinfo = None
-        creationflags = 0
-        if os.name == "nt":
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            creationflags = getattr(subprocess, "CREATE_NO_WINDOW", 0)
 
         cmd = [
             exe,
@@ -1441,8 +1441,7 @@ class Converter:
             final_path,
         ]
         log.debug("CONV: ffmpeg AIFF cmd: %s", " ".join(shlex.quote(c) for c in cmd))
-        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
-                              startupinfo=startupinfo, creationflags=creationflags)
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, **NO_WINDOW_KWARGS)
         if proc.returncode != 0:
             raise RuntimeError(proc.stderr or "ffmpeg failed")
 
@@ -1485,14 +1484,6 @@ class Converter:
         - Parse progression et pousse à l'UI
         - Arrêt propre si cancel_event
         """
-        # --- empêcher l'ouverture d'une console sur Windows ---
-        startupinfo = None
-        creationflags = 0
-        if os.name == "nt":
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            creationflags = getattr(subprocess, "CREATE_NO_WINDOW", 0)
-
         try:
             proc = subprocess.Popen(
                 cmd,
@@ -1501,8 +1492,7 @@ class Converter:
                 text=True,
                 universal_newlines=True,
                 bufsize=1,
-                startupinfo=startupinfo,
-                creationflags=creationflags,
+                **NO_WINDOW_KWARGS,  # pas de console sur Windows
             )
         except FileNotFoundError:
             log.error("yt-dlp introuvable (ni binaire embarqué, ni PATH, ni module).")
@@ -1570,8 +1560,8 @@ def _read_csv(path: str) -> list[dict]:
 
 def _sanitize_filename(name: str, for_dir: bool = False) -> str:
     name = name.strip().replace("\n", " ")
-    name = re.sub(r'[\\/:*?"<>|]', "_", name)
-    name = re.sub(r"\s+", " ", name).strip()
+    name = _UNSAFE_FILENAME_RE.sub("_", name)
+    name = _WHITESPACE_RE.sub(" ", name).strip()
     if len(name) > 150:
         name = name[:150].rstrip()
     if not name:
@@ -1587,9 +1577,9 @@ def _norm_text(s: str) -> str:
         return ""
     s = unicodedata.normalize("NFKD", s)
     s = "".join(ch for ch in s if not unicodedata.combining(ch))
-    s = re.sub(r"[\(\)\[\]\{\}\|_/\\\-]+", " ", s)
-    s = re.sub(r"[^a-z0-9\s]", "", s)
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _NORM_SEPARATORS_RE.sub(" ", s)
+    s = _NORM_DROP_RE.sub("", s)
+    s = _WHITESPACE_RE.sub(" ", s).strip()
     return s
 
 
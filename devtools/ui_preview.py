@@ -20,8 +20,13 @@ class FakeConverter:
         self.config = config or {}
 
     def convert_from_csv(self, csv_path, output_folder, playlist_name_hint=None, source_info=None):
-        with open(csv_path, encoding='utf-8') as f:
-            rows = list(csv.DictReader(f))
+        with open(csv_path, encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            rows = [row for row in reader if row]
+        idx = {h: i for i, h in enumerate(header)}
+        title_i = idx.get("Track Name")
+        artist_i = idx.get("Artist Name(s)")
         total = len(rows)
         name = playlist_name_hint or "Preview Playlist"
 
@@ -30,12 +35,13 @@ class FakeConverter:
         self.status_cb(f"Starting fake download of {total} tracks…")
 
         for i, row in enumerate(rows, start=1):
-            title = row.get("Track Name", f"Track {i}")
-            artist = row.get("Artist Name(s)", "Artist")
+            title = row[title_i] if title_i is not None and title_i < len(row) else f"Track {i}"
+            artist = row[artist_i] if artist_i is not None and artist_i < len(row) else "Artist"
             self.item_cb('init', {'idx': i, 'title': f"{title} — {artist}"})
-            for p in range(0, 101, 5):
+            # 0/25/50/75/100 only: each progress event repaints the row in the GUI
+            for p in range(0, 101, 25):
                 self.item_cb('progress', {'idx': i, 'percent': p, 'speed': '1.2MB/s', 'eta': '00:10'})
-                time.sleep(0.03)
+                time.sleep(0.15)
             self.item_cb('done', {'idx': i})
 
         self.status_cb("✅ Done (fake)")
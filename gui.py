@@ -1,5 +1,5 @@
 # gui.py
-import os, csv, platform, tempfile, threading, queue, time, tkinter as tk, json
+import os, platform, threading, queue, time, tkinter as tk, json
 from tkinter import filedialog, messagebox
 from tkinter import ttk
 
@@ -7,11 +7,10 @@ import logging
 log = logging.getLogger(__name__)
 
 from config import load_config, resource_path
-from utils import Tooltip, open_folder, open_path
+from utils import Tooltip, open_folder, open_path, open_temp_csv, write_temp_csv
 from converter import Converter
-from spotify_api import SpotifyClient
-from soundcloud_api import SoundCloudClient
-from token_store import RefreshTokenStore
+from spotify_api import SpotifyClient, shared_client
+from soundcloud_api import CSV_FIELDS as SOUNDCLOUD_CSV_FIELDS, SoundCloudClient
 
 try:
     from tkinterdnd2 import DND_FILES
@@ -36,6 +35,7 @@ class Music2MP3GUI:
 
         # state
         self.csv_path = None
+        self._csv_path_verified = False  # csv_path known to exist (picked, dropped or written by us)
         self.output_folder = None
         self.last_output_dir = None
         self._loaded_playlist_name_from_spotify = None
@@ -90,11 +90,8 @@ class Music2MP3GUI:
         # default dir (persisted automatically)
         self._apply_persisted_default_output()
 
-        # default directory for file dialogs
-        if platform.system() == "Windows":
-            self.last_directory = os.path.join(os.path.expanduser("~"), "Downloads")
-        else:
-            self.last_directory = os.path.expanduser("~/Downloads")
+        # default directory for file dialogs (same ~/Downloads on every OS)
+        self.last_directory = os.path.join(os.path.expanduser("~"), "Downloads")
 
         self._init_styles()
         self._build_ui()
@@ -405,7 +402,7 @@ class Music2MP3GUI:
     # ---------- click CSV label ----------
     def _click_csv_label(self, _=None):
         if self.csv_path and os.path.isfile(self.csv_path):
-            if not open_path(self.csv_path):
+            if not open_path(self.csv_path, trust=True):  # isfile() just passed
                 messagebox.showerror('Error', 'Unable to open CSV.')
         else:
             self.browse_csv()
@@ -433,6 +430,7 @@ class Music2MP3GUI:
 
     def _load_csv_path(self, path: str):
         self.csv_path = path
+        self._csv_path_verified = os.path.isfile(path)
         self.last_directory = os.path.dirname(path)
         self._style_drop_loaded(os.path.basename(path))
         self.status_label.config(text='CSV loaded.')
@@ -443,13 +441,6 @@ class Music2MP3GUI:
     # ---------- Spotify loader ----------
     def load_from_spotify_link_wrapper(self):
         log.info("UI: Spotify load button clicked")
-        try:
-            from spotify_auth import PKCEAuth
-        except Exception as e:
-            log.exception("UI: PKCEAuth import failed")
-            messagebox.showerror('Missing dependency', f'spotify_auth.PKCEAuth not available:\n{e}')
-            return
-
         url = self.spotify_entry.get().strip()
         log.debug("UI: Spotify URL entered = %s", url)
         pid = SpotifyClient.extract_playlist_id(url)
@@ -472,19 +463,14 @@ class Music2MP3GUI:
         def _spotify_worker():
             log.info("BG: Spotify worker started for playlist %s", pid)
             try:
-                token_store = RefreshTokenStore(service="Music2MP3", user="spotify_pkce")
-                auth = PKCEAuth(client_id=client_id, redirect_uri="http://127.0.0.1:8765/callback",
-                                scopes=["playlist-read-private", "playlist-read-collaborative"],
-                                refresh_token_store=token_store)
-                sp = SpotifyClient(token_supplier=auth.get_token)
+                sp = shared_client(client_id)
                 self._sp_q.put(('status', 'Fetching playlist from Spotify…'))
-                rows, name = sp.fetch_playlist(pid)
-                log.info("BG: Spotify fetched %s items for '%s'", len(rows), name)
-                fd, tmp = tempfile.mkstemp(prefix='spotify_playlist_', suffix='.csv'); os.close(fd)
-                with open(tmp, 'w', newline='', encoding='utf-8') as f:
-                    w = csv.DictWriter(f, fieldnames=["Track Name","Artist Name(s)","Album Name","Duration (ms)"])
-                    w.writeheader(); w.writerows(rows)
-                self._sp_q.put(('done', (tmp, name, len(rows))))
+                tracks, name = sp.fetch_playlist_tracks(pid)
+                with open_temp_csv('spotify_playlist_') as f:
+                    tmp = f.name
+                    count = sp.write_csv(tracks, f)
+                log.info("BG: Spotify fetched %s items for '%s'", count, name)
+                self._sp_q.put(('done', (tmp, name, count)))
             except Exception as e:
                 log.exception("BG: Spotify worker failed")
                 self._sp_q.put(('error', str(e)))
@@ -504,6 +490,7 @@ class Music2MP3GUI:
                 elif kind == 'done':
                     tmp, name, n = payload
                     self.csv_path = tmp
+                    self._csv_path_verified = True
                     self._loaded_playlist_name_from_spotify = name or "SpotifyPlaylist"
                     self._loaded_source_info = {"type": "spotify", "url": url, "name": self._loaded_playlist_name_from_spotify}
                     self._style_drop_loaded(os.path.basename(tmp))
@@ -538,12 +525,7 @@ class Music2MP3GUI:
                 sc = SoundCloudClient()
                 rows, name = sc.fetch_playlist(url, cookies_path=cookies_path)
                 log.info("BG: SoundCloud fetched %s items for '%s'", len(rows), name)
-                fd, tmp = tempfile.mkstemp(prefix='soundcloud_playlist_', suffix='.csv'); os.close(fd)
-                with open(tmp, 'w', newline='', encoding='utf-8') as f:
-                    w = csv.DictWriter(f, fieldnames=[
-                        "Track Name","Artist Name(s)","Album Name","Duration (ms)","Source URL","Track URI"
-                    ])
-                    w.writeheader(); w.writerows(rows)
+                tmp = write_temp_csv(rows, SOUNDCLOUD_CSV_FIELDS, 'soundcloud_playlist_')
                 self._sc_q.put(('done', (tmp, name, len(rows))))
             except Exception as e:
                 log.exception("BG: SoundCloud worker failed")
@@ -562,6 +544,7 @@ class Music2MP3GUI:
                 if kind == 'done':
                     tmp, name, n = payload
                     self.csv_path = tmp
+                    self._csv_path_verified = True
                     self._loaded_playlist_name_from_spotify = name or "SoundCloud"
                     self._loaded_source_info = {"type": "soundcloud", "url": url, "name": self._loaded_playlist_name_from_spotify}
                     self._style_drop_loaded(os.path.basename(tmp))
@@ -601,14 +584,12 @@ class Music2MP3GUI:
                 "Track URI": "",
             })
 
-        fd, tmp = tempfile.mkstemp(prefix='manual_tracks_', suffix='.csv'); os.close(fd)
-        with open(tmp, 'w', newline='', encoding='utf-8') as f:
-            w = csv.DictWriter(f, fieldnames=[
-                "Track Name","Artist Name(s)","Album Name","Duration (ms)","Source URL","Track URI"
-            ])
-            w.writeheader(); w.writerows(rows)
+        tmp = write_temp_csv(rows, [
+            "Track Name","Artist Name(s)","Album Name","Duration (ms)","Source URL","Track URI"
+        ], 'manual_tracks_')
 
         self.csv_path = tmp
+        self._csv_path_verified = True
         self._loaded_playlist_name_from_spotify = "ManualList"
         self._loaded_source_info = {"type": "manual", "url": "", "name": "ManualList"}
         self._style_drop_loaded(os.path.basename(tmp))
@@ -627,6 +608,7 @@ class Music2MP3GUI:
 
     def clear_selection(self):
         self.csv_path = None
+        self._csv_path_verified = False
         self.drop_label.config(text='Drop a CSV here or click to browse', bg='#eef2ff', fg='#1f2937')
         self.drop_frame.config(bg='#eef2ff')
         self.status_label.config(text='Status: Waiting…')
@@ -658,7 +640,7 @@ class Music2MP3GUI:
             messagebox.showerror('Error', 'No valid folder to open.')
 
     def update_convert_button_state(self):
-        ok = (self.csv_path and os.path.isfile(self.csv_path) and self.csv_path.lower().endswith('.csv') and self.output_folder)
+        ok = (self.csv_path and self._csv_path_verified and self.csv_path.lower().endswith('.csv') and self.output_folder)
         self.convert_button.config(state=tk.NORMAL if ok else tk.DISABLED)
         self.clear_button.config(state=tk.NORMAL if self.csv_path else tk.DISABLED)
 
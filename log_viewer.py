@@ -1,48 +1,67 @@
 # log_viewer.py
 import logging
+import time
 import tkinter as tk
 from tkinter import ttk
-from queue import Queue, Empty
-from datetime import datetime
+from collections import deque
 
 _LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
 _LEVEL_TO_NO = {name: getattr(logging, name) for name in _LEVELS}
+_MAX_PENDING = 2000
+_TREE_THRESHOLD = 10000  # au-delà, le tk.Text rame : bascule sur un ttk.Treeview
+_COLORS = {
+    "DEBUG": "#6b7280",
+    "INFO": "#111827",
+    "WARNING": "#b45309",
+    "ERROR": "#b91c1c",
+    "CRITICAL": "#7f1d1d",
+}
 
 class _TkLogHandler(logging.Handler):
-    """Handler thread-safe: push les records dans une Queue lue par la GUI."""
-    def __init__(self, q: Queue):
+    """Handler thread-safe: push les records dans une deque bornée lue par la GUI.
+
+    append/popleft sont atomiques en CPython : pas de verrou, et en cas de
+    débordement ce sont les plus vieux records qui sautent, pas les récents.
+    """
+    def __init__(self, dq: deque):
         super().__init__()
-        self.q = q
+        self.dq = dq
 
     def emit(self, record):
-        try:
-            self.q.put_nowait(record)
-        except Exception:
-            pass
+        self.dq.append(record)
 
 class LogWindow(tk.Toplevel):
     _instance = None  # singleton
 
     @classmethod
-    def get_or_create(cls, root, queue: Queue):
+    def get_or_create(cls, root, records: deque, handler: logging.Handler | None = None):
         if cls._instance is None or not cls._instance.winfo_exists():
-            cls._instance = cls(root, queue)
+            cls._instance = cls(root, records, handler)
         else:
             cls._instance.deiconify()
             cls._instance.lift()
         return cls._instance
 
-    def __init__(self, root, queue: Queue):
+    def __init__(self, root, records: deque, handler: logging.Handler | None = None):
         super().__init__(root)
         self.title("Console des logs")
         self.geometry("900x360")
         self.minsize(600, 240)
 
-        self.queue = queue
+        self.records = records
+        self.handler = handler
+        self._last_ts_int = None
+        self._last_ts_str = ""
+        self._text_rows: list[tuple] = []  # valeurs des lignes du Text, rejouées dans le Treeview
+        self.tree = None
+        self._tree_mode = False
         self.paused = tk.BooleanVar(value=False)
         self.autoscroll = tk.BooleanVar(value=True)
         self.level = tk.StringVar(value="INFO")
         self.search_var = tk.StringVar(value="")
+        # niveau caché : évite un aller-retour Tcl (StringVar.get) par record
+        self._on_level_changed()
+        self.level.trace_add("write", self._on_level_changed)
 
         # UI top-bar
         top = ttk.Frame(self); top.pack(fill="x", padx=8, pady=6)
@@ -57,23 +76,20 @@ class LogWindow(tk.Toplevel):
         ttk.Button(top, text="Suivant", command=self._find_next).pack(side="left", padx=(6, 0))
 
         # Text zone
-        body = ttk.Frame(self); body.pack(fill="both", expand=True, padx=8, pady=(0, 8))
+        self.body = body = ttk.Frame(self); body.pack(fill="both", expand=True, padx=8, pady=(0, 8))
         self.text = tk.Text(body, wrap="none", state="disabled", undo=False)
-        vsb = ttk.Scrollbar(body, orient="vertical", command=self.text.yview)
-        hsb = ttk.Scrollbar(body, orient="horizontal", command=self.text.xview)
-        self.text.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
-        self.text.grid(row=0, column=0, sticky="nsew")
-        vsb.grid(row=0, column=1, sticky="ns")
-        hsb.grid(row=1, column=0, sticky="ew")
+        self.vsb = ttk.Scrollbar(body, orient="vertical")
+        self.hsb = ttk.Scrollbar(body, orient="horizontal")
+        self.vsb.grid(row=0, column=1, sticky="ns")
+        self.hsb.grid(row=1, column=0, sticky="ew")
         body.rowconfigure(0, weight=1)
         body.columnconfigure(0, weight=1)
+        self._show_surface(self.text)
 
         # color tags
-        self.text.tag_config("DEBUG", foreground="#6b7280")
-        self.text.tag_config("INFO", foreground="#111827")
-        self.text.tag_config("WARNING", foreground="#b45309")
-        self.text.tag_config("ERROR", foreground="#b91c1c")
-        self.text.tag_config("CRITICAL", foreground="#7f1d1d", underline=1)
+        for lvl, color in _COLORS.items():
+            self.text.tag_config(lvl, foreground=color)
+        self.text.tag_config("CRITICAL", underline=1)
 
         self.protocol("WM_DELETE_WINDOW", self._on_close)
         self._poll()
@@ -84,43 +100,101 @@ class LogWindow(tk.Toplevel):
 
     def _clear(self):
         self.text.config(state="normal"); self.text.delete("1.0", "end"); self.text.config(state="disabled")
-
-    def _append_line(self, line: str, levelname: str):
+        self._text_rows.clear()
+        if self.tree is not None:
+            self.tree.delete(*self.tree.get_children())
+            self._tree_mode = False
+            self._show_surface(self.text)
+
+    def _show_surface(self, widget):
+        """Affiche `widget` (Text ou Treeview) dans la zone de logs et y branche les scrollbars."""
+        for other in (self.text, self.tree):
+            if other is not None and other is not widget:
+                other.grid_remove()
+        widget.configure(yscrollcommand=self.vsb.set, xscrollcommand=self.hsb.set)
+        self.vsb.configure(command=widget.yview)
+        self.hsb.configure(command=widget.xview)
+        widget.grid(row=0, column=0, sticky="nsew")
+
+    def _switch_to_tree(self):
+        """
+        Gros volume : le Treeview stocke les valeurs côté C sans la gestion des tags
+        caractère par caractère du Text. On y rejoue les lignes déjà affichées.
+        """
+        if self.tree is None:
+            self.tree = ttk.Treeview(self.body, columns=("ts", "lvl", "name", "msg"), show="headings")
+            for col, title, width, stretch in (
+                ("ts", "Heure", 150, False),
+                ("lvl", "Niveau", 80, False),
+                ("name", "Module", 160, False),
+                ("msg", "Message", 600, True),
+            ):
+                self.tree.heading(col, text=title, anchor="w")
+                self.tree.column(col, width=width, stretch=stretch, anchor="w")
+            for lvl, color in _COLORS.items():
+                self.tree.tag_configure(lvl, foreground=color)
+        for values in self._text_rows:
+            self.tree.insert("", "end", values=values, tags=(values[1],))
+        self._text_rows.clear()
+        self.text.config(state="normal"); self.text.delete("1.0", "end"); self.text.config(state="disabled")
+        self._tree_mode = True
+        self._show_surface(self.tree)
+        if self.autoscroll.get():
+            children = self.tree.get_children()
+            if children:
+                self.tree.see(children[-1])
+
+    def _append_line(self, values: tuple):
+        ts, levelname, name, msg = values
+        if self._tree_mode:
+            item = self.tree.insert("", "end", values=(ts, levelname, name, msg.replace("\n", " | ")), tags=(levelname,))
+            if self.autoscroll.get():
+                self.tree.see(item)
+            return
         self.text.config(state="normal")
-        self.text.insert("end", line + "\n", levelname)
+        self.text.insert("end", f"{ts} {levelname} {name}: {msg}\n", levelname)
         if self.autoscroll.get():
             self.text.see("end")
         self.text.config(state="disabled")
-
-    def _format_record(self, r: logging.LogRecord) -> str:
-        ts = datetime.fromtimestamp(r.created).strftime("%Y-%m-%d %H:%M:%S")
-        msg = r.getMessage()
-        return f"{ts} {r.levelname} {r.name}: {msg}"
+        self._text_rows.append((ts, levelname, name, msg.replace("\n", " | ")))
+        if len(self._text_rows) >= _TREE_THRESHOLD:
+            self._switch_to_tree()
+
+    def _record_values(self, r: logging.LogRecord) -> tuple:
+        # une rafale de logs tombe souvent dans la même seconde : on réutilise l'horodatage
+        ts_int = int(r.created)
+        if ts_int != self._last_ts_int:
+            self._last_ts_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts_int))
+            self._last_ts_int = ts_int
+        return (self._last_ts_str, r.levelname, r.name, r.getMessage())
+
+    def _on_level_changed(self, *_args):
+        self._current_levelno = _LEVEL_TO_NO.get(self.level.get(), logging.INFO)
+        if self.handler is not None:
+            # le filtrage se fait dès logging : les records sous le seuil n'entrent pas dans la deque
+            self.handler.setLevel(self._current_levelno)
 
     def _passes_filter(self, r: logging.LogRecord) -> bool:
-        try:
-            current = _LEVEL_TO_NO[self.level.get()]
-        except KeyError:
-            current = logging.INFO
-        return r.levelno >= current
+        return r.levelno >= self._current_levelno
 
     def _poll(self):
         if not self.paused.get():
-            try:
-                from queue import Empty
-                while True:
-                    r = self.queue.get_nowait()
-                    if self._passes_filter(r):
-                        line = self._format_record(r)
-                        self._append_line(line, r.levelname)
-            except Empty:
-                pass
+            while self.records:
+                try:
+                    r = self.records.popleft()
+                except IndexError:
+                    break
+                if self._passes_filter(r):
+                    self._append_line(self._record_values(r))
         self.after(100, self._poll)
 
     def _find_next(self):
         q = self.search_var.get()
         if not q:
             return
+        if self._tree_mode:
+            self._find_next_in_tree(q.lower())
+            return
         idx = self.text.search(q, self.text.index("insert +1c"), nocase=True, stopindex="end")
         if not idx:
             idx = self.text.search(q, "1.0", nocase=True, stopindex="end")
@@ -132,16 +206,24 @@ class LogWindow(tk.Toplevel):
         self.text.mark_set("insert", end)
         self.text.see(idx)
 
+    def _find_next_in_tree(self, needle: str):
+        items = self.tree.get_children()
+        selected = self.tree.selection()
+        start = items.index(selected[0]) + 1 if selected else 0
+        for item in items[start:] + items[:start]:
+            if any(needle in str(v).lower() for v in self.tree.item(item, "values")):
+                self.tree.selection_set(item)
+                self.tree.see(item)
+                return
+
 def attach_live_log_handler(root):
     """
-    Crée la Queue, un handler logging thread-safe, et la fenêtre (cachée par défaut).
-    Retourne (handler, queue, window).
+    Crée la deque, un handler logging thread-safe, et la fenêtre (cachée par défaut).
+    Retourne (handler, deque, window).
     """
-    from queue import Queue
-    q = Queue(maxsize=1000)
+    q = deque(maxlen=_MAX_PENDING)
     handler = _TkLogHandler(q)
-    handler.setLevel(logging.DEBUG)  # on envoie tout; filtrage dans la fenêtre
     logging.getLogger().addHandler(handler)
-    win = LogWindow.get_or_create(root, q)
+    win = LogWindow.get_or_create(root, q, handler)  # règle le niveau du handler
     win.withdraw()
     return handler, q, win
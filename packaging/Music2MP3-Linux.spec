@@ -44,7 +44,9 @@ a = Analysis(
     hiddenimports=[],
     hookspath=[],
     runtime_hooks=[],
-    excludes=['zlib'],
+    # Keep the yt_dlp module out: frozen builds then use the bundled, updatable
+    # yt-dlp binary for SoundCloud metadata, same as for downloads.
+    excludes=['zlib', 'yt_dlp'],
     win_no_prefer_redirects=False,
     win_private_assemblies=False,
     cipher=block_cipher,
@@ -42,7 +42,9 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    # Keep the yt_dlp module out: frozen builds then use the bundled, updatable
+    # yt-dlp binary for SoundCloud metadata, same as for downloads.
+    excludes=['yt_dlp'],
     noarchive=False,
     optimize=0,
 )
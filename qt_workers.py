@@ -1,8 +1,5 @@
 from __future__ import annotations
 
-import csv
-import os
-import tempfile
 import threading
 
 from PySide6.QtCore import QObject, Signal, Slot
@@ -10,10 +7,9 @@ from PySide6.QtCore import QObject, Signal, Slot
 from bandcamp_api import BandcampClient
 from converter import Converter
 from library_cleanup import analyze_library_cleanup
-from soundcloud_api import SoundCloudClient
-from spotify_api import SpotifyClient
-from spotify_auth import PKCEAuth
-from token_store import RefreshTokenStore
+from soundcloud_api import CSV_FIELDS as SOUNDCLOUD_CSV_FIELDS, SoundCloudClient
+from spotify_api import SpotifyClient, shared_client
+from utils import open_temp_csv, write_temp_csv
 
 
 class ConverterWorker(QObject):
@@ -94,18 +90,13 @@ class PlaylistLoadWorker(QObject):
         if not client_id:
             raise RuntimeError('Missing "spotify_client_id" in config.')
         self.status.emit("Opening browser for Spotify authorization...")
-        token_store = RefreshTokenStore(service="Music2MP3", user="spotify_pkce")
-        auth = PKCEAuth(
-            client_id=client_id,
-            redirect_uri="http://127.0.0.1:8765/callback",
-            scopes=["playlist-read-private", "playlist-read-collaborative"],
-            refresh_token_store=token_store,
-        )
-        sp = SpotifyClient(token_supplier=auth.get_token)
+        sp = shared_client(client_id)
         self.status.emit("Fetching playlist from Spotify...")
-        rows, name = sp.fetch_playlist(pid)
-        tmp = self._write_temp_csv(rows, ["Track Name", "Artist Name(s)", "Album Name", "Duration (ms)"], "spotify_playlist_")
-        return {"csv_path": tmp, "playlist_name": name or "SpotifyPlaylist", "count": len(rows),
+        tracks, name = sp.fetch_playlist_tracks(pid)
+        with open_temp_csv("spotify_playlist_") as f:
+            tmp = f.name
+            count = sp.write_csv(tracks, f)
+        return {"csv_path": tmp, "playlist_name": name or "SpotifyPlaylist", "count": count,
                 "source": "Spotify", "source_type": "spotify", "source_url": self.url}
 
     def _load_soundcloud(self) -> dict:
@@ -117,11 +108,7 @@ class PlaylistLoadWorker(QObject):
             cookies_from_browser=self.config.get("cookies_from_browser"),
             cookies_browser_profile=self.config.get("cookies_browser_profile"),
         )
-        tmp = self._write_temp_csv(
-            rows,
-            ["Track Name", "Artist Name(s)", "Album Name", "Duration (ms)", "Source URL", "Track URI"],
-            "soundcloud_playlist_",
-        )
+        tmp = write_temp_csv(rows, SOUNDCLOUD_CSV_FIELDS, "soundcloud_playlist_")
         return {"csv_path": tmp, "playlist_name": name or "SoundCloud", "count": len(rows),
                 "source": "SoundCloud", "source_type": "soundcloud", "source_url": self.url}
 
@@ -130,7 +117,7 @@ class PlaylistLoadWorker(QObject):
         bc = BandcampClient()
         cookies_path = self.config.get("cookies_path")
         rows, name = bc.fetch_playlist(self.url, cookies_path=cookies_path)
-        tmp = self._write_temp_csv(
+        tmp = write_temp_csv(
             rows,
             ["Track Name", "Artist Name(s)", "Album Name", "Duration (ms)", "Source URL", "Track URI"],
             "bandcamp_release_",
@@ -138,16 +125,6 @@ class PlaylistLoadWorker(QObject):
         return {"csv_path": tmp, "playlist_name": name or "Bandcamp", "count": len(rows),
                 "source": "Bandcamp", "source_type": "bandcamp", "source_url": self.url}
 
-    @staticmethod
-    def _write_temp_csv(rows, fieldnames, prefix) -> str:
-        fd, tmp = tempfile.mkstemp(prefix=prefix, suffix=".csv")
-        os.close(fd)
-        with open(tmp, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(rows)
-        return tmp
-
 
 class LibraryCleanupWorker(QObject):
     done = Signal(object)
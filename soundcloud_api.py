@@ -1,17 +1,69 @@
 # soundcloud_api.py
-import json
+import importlib.util
+import logging
 import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Tuple, List, Dict
 from urllib.parse import parse_qs, urlsplit, urlunsplit
 
 import requests
 
-from utils import build_ytdlp_cookie_args, find_ytdlp_cmd, run_quiet
+from utils import build_ytdlp_cookie_args, build_ytdlp_cookie_opts, find_ytdlp_cmd, json_loads, popen_quiet
 from config import resource_path
 
+log = logging.getLogger(__name__)
+
+_SC_HYDRATION_RE = re.compile(r"<script>window\.__sc_hydration\s*=\s*(.*?);</script>", re.S)
+_SC_SET_PATH_RE = re.compile(r"/(?:sets|playlists)(?:/|$)")
+# Everything _row_from_info/_looks_full/_merge_ytdlp_entries read. Full yt-dlp
+# infos also carry formats, thumbnails, etc., which we never need to keep.
+_SC_INFO_FIELDS = (
+    "id", "title", "track", "artist", "uploader", "uploader_id", "creator", "channel",
+    "user", "album", "duration", "permalink_url", "webpage_url", "original_url", "url",
+    "playlist", "playlist_title",
+)
+# Field priority for rows: first non-empty value wins.
+_TITLE_KEYS = ("title", "track")
+_ARTIST_KEYS = ("artist", "uploader", "creator", "channel", "uploader_id")
+_USER_ARTIST_KEYS = ("username", "permalink")
+_URL_KEYS = ("permalink_url", "webpage_url", "original_url", "url")
+# Row keys, in the column order the loaders write them.
+CSV_FIELDS = ("Track Name", "Artist Name(s)", "Album Name", "Duration (ms)", "Source URL", "Track URI")
+
 
 def _find_ytdlp_cmd() -> list[str]:
     return find_ytdlp_cmd(resource_path)
+
+
+# The bundled/PATH lookup never changes while the app runs; resolve it once.
+_YTDLP_CMD = tuple(_find_ytdlp_cmd())
+# Only probe for the module here: importing yt_dlp loads hundreds of extractors,
+# which app start-up should not pay for. _extract_sc_info imports it on first use.
+_YTDLP_MODULE_AVAILABLE = importlib.util.find_spec("yt_dlp") is not None
+
+
+class _YtdlpLogger:
+    """Send in-process yt-dlp messages to the app's logging instead of stderr."""
+
+    def debug(self, msg):
+        log.debug("yt-dlp: %s", msg)
+
+    def info(self, msg):
+        log.debug("yt-dlp: %s", msg)
+
+    def warning(self, msg):
+        log.warning("yt-dlp: %s", msg)
+
+    def error(self, msg):
+        log.error("yt-dlp: %s", msg)
+
+
+_YTDLP_LOGGER = _YtdlpLogger()
+
+# Page + api-v2 lookups all hit soundcloud.com hosts: keep connections alive.
+_SESSION = requests.Session()
+_SESSION.headers["User-Agent"] = "Mozilla/5.0"
 
 
 class SoundCloudClient:
@@ -25,11 +77,17 @@ class SoundCloudClient:
         url: str,
         cookies_path: str | None = None,
         cookies_from_browser: str | None = None,
-        cookies_browser_profile: str | None = None,
-    ) -> Tuple[List[Dict], str]:
+        cookies_browser_profile: str | None = None,
+        max_workers: int = 8,
+        flat: bool = False,
+    ) -> Tuple[List[Dict], str]:
         """
         Returns (rows, name)
 
+        max_workers bounds how many semi-flat entries are re-fetched at once.
+        flat=True lists the set with --flat-playlist first and leaves per-track
+        metadata to that parallel enrichment.
+
         Each row:
           Track Name, Artist Name(s), Album Name, Duration (ms), Source URL, Track URI
         """
@@ -43,37 +101,26 @@ class SoundCloudClient:
         }
         data = self._fetch_page_hydration(url) if _is_soundcloud_set_url(url) else {}
         if not data:
-            data = self._fetch_with_ytdlp(url, cookie_config)
+            data = self._fetch_with_ytdlp(url, cookie_config, flat=flat)
 
-        rows: List[Dict] = []
         playlist_title = data.get("title") or data.get("playlist_title") or "SoundCloud"
 
         entries = data.get("entries")
         if isinstance(entries, list) and entries:
             # Playlist case
-            for e in entries:
-                # Some extractors still return semi-flat entries: enrich if needed.
-                # Page hydration already has title, duration, URL and nested user.
-                if not self._looks_full(e):
-                    track_url = e.get("webpage_url") or e.get("permalink_url") or e.get("url")
-                    if track_url:
-                        try:
-                            e = self._dump_sc_json(track_url, cookie_config=cookie_config, flat=False)
-                        except RuntimeError:
-                            pass
-                rows.append(self._row_from_info(e, playlist_title))
+            entries = self._enrich_entries(entries, cookie_config, max_workers)
+            rows = [self._row_from_info(e, playlist_title) for e in entries]
             return rows, playlist_title
 
         # Single track
-        rows.append(self._row_from_info(data, playlist_title))
-        return rows, playlist_title
+        return [self._row_from_info(data, playlist_title)], playlist_title
 
-    def _fetch_with_ytdlp(self, url: str, cookie_config: dict) -> Dict:
+    def _fetch_with_ytdlp(self, url: str, cookie_config: dict, flat: bool = False) -> Dict:
         try:
-            return self._dump_sc_json(url, cookie_config=cookie_config, flat=False)
+            return self._dump_sc_json(url, cookie_config=cookie_config, flat=flat)
         except RuntimeError as first_error:
             try:
-                return self._dump_sc_json(url, cookie_config=cookie_config, flat=True)
+                return self._dump_sc_json(url, cookie_config=cookie_config, flat=not flat)
             except RuntimeError as second_error:
                 data = self._fetch_page_hydration(url)
                 if not data:
@@ -82,35 +129,92 @@ class SoundCloudClient:
 
     # ------------------ helpers ------------------
 
+    def _enrich_entries(self, entries: list, cookie_config: dict, max_workers: int) -> list:
+        """
+        Some extractors still return semi-flat entries: re-fetch those per track.
+        Page hydration already has title, duration, URL and nested user.
+        Each re-fetch is network-bound, so they run on a small thread pool and
+        results are put back at their playlist index.
+        """
+        pending: dict[int, str] = {}
+        looks_full = self._looks_full
+        for idx, e in enumerate(entries):
+            if looks_full(e):
+                continue
+            track_url = e.get("webpage_url") or e.get("permalink_url") or e.get("url")
+            if track_url:
+                pending[idx] = track_url
+        if not pending:
+            return entries
+
+        enriched = list(entries)
+        if not _YTDLP_MODULE_AVAILABLE:
+            self._enrich_in_batches(enriched, pending, cookie_config, max_workers)
+            return enriched
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as pool:
+            futures = {
+                pool.submit(self._dump_sc_json, track_url, cookie_config=cookie_config, flat=False): idx
+                for idx, track_url in pending.items()
+            }
+            for future in as_completed(futures):
+                try:
+                    enriched[futures[future]] = future.result()
+                except RuntimeError:
+                    pass
+        return enriched
+
+    def _enrich_in_batches(self, enriched: list, pending: dict, cookie_config: dict, max_workers: int) -> None:
+        """
+        Subprocess variant of the enrichment: every yt-dlp process pays the
+        interpreter start-up, so each worker gets a batch of URLs instead of one.
+        Failed tracks are skipped by yt-dlp, so infos are matched back to their
+        playlist index by the URL we passed (original_url), then by track id.
+        """
+        by_url: dict[str, list[int]] = {}
+        by_id: dict[str, list[int]] = {}
+        for idx, track_url in pending.items():
+            by_url.setdefault(track_url, []).append(idx)
+            tid = enriched[idx].get("id")
+            if tid:
+                by_id.setdefault(str(tid), []).append(idx)
+
+        urls = list(by_url)
+        workers = max(1, min(max_workers, len(urls)))
+        size = -(-len(urls) // workers)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(self._dump_sc_json_many, urls[start:start + size], cookie_config=cookie_config)
+                for start in range(0, len(urls), size)
+            ]
+            for future in as_completed(futures):
+                try:
+                    infos = future.result()
+                except RuntimeError:
+                    continue
+                for info in infos:
+                    targets = by_url.get(info.get("original_url") or "") or by_id.get(str(info.get("id") or ""), ())
+                    for idx in targets:
+                        enriched[idx] = info
+
     def _looks_full(self, info: Dict) -> bool:
         """Heuristic to see if we have rich fields already."""
-        user = info.get("user") if isinstance(info.get("user"), dict) else {}
-        return bool(info.get("title")) and bool(
-            info.get("uploader")
-            or info.get("uploader_id")
-            or info.get("artist")
-            or info.get("creator")
-            or user.get("username")
-            or user.get("permalink")
-        )
+        # Semi-flat entries usually lack a title: bail out before any artist lookup.
+        if not info.get("title"):
+            return False
+        if info.get("uploader") or info.get("uploader_id") or info.get("artist") or info.get("creator"):
+            return True
+        user = info.get("user")
+        return isinstance(user, dict) and bool(user.get("username") or user.get("permalink"))
 
     def _row_from_info(self, info: Dict, playlist_title: str = "") -> Dict:
         url = self._best_track_url(info)
-        inferred_artist, inferred_title = _title_artist_from_soundcloud_url(url)
         user = info.get("user") if isinstance(info.get("user"), dict) else {}
-        title = (info.get("title")
-                 or info.get("track")
-                 or inferred_title
-                 or "Unknown")
-        artist = (info.get("artist")
-                  or info.get("uploader")
-                  or info.get("creator")
-                  or info.get("channel")
-                  or info.get("uploader_id")
-                  or user.get("username")
-                  or user.get("permalink")
-                  or inferred_artist
-                  or "Unknown")
+        title = _first(info, _TITLE_KEYS)
+        artist = _first(info, _ARTIST_KEYS) or _first(user, _USER_ARTIST_KEYS)
+        if not (title and artist):
+            inferred_artist, inferred_title = _title_artist_from_soundcloud_url(url)
+            title = title or inferred_title or "Unknown"
+            artist = artist or inferred_artist or "Unknown"
         dur_ms = _duration_ms(info.get("duration"))
         tid = info.get("id") or ""
         album = info.get("album") or (playlist_title if playlist_title else "")
@@ -122,10 +226,10 @@ class SoundCloudClient:
             "Duration (ms)": dur_ms,
             "Source URL": url,
             "Track URI": f"soundcloud:track:{tid}" if tid else "",
-        }
+        }
 
     def _best_track_url(self, info: Dict) -> str:
-        for key in ("permalink_url", "webpage_url", "original_url", "url"):
+        for key in _URL_KEYS:
             raw = str(info.get(key) or "").strip()
             if not raw:
                 continue
@@ -134,45 +238,118 @@ class SoundCloudClient:
                 return cleaned
         return ""
 
-    def _dump_sc_json(self, url: str, cookie_config: dict | None = None, flat: bool = False) -> Dict:
+    def _dump_sc_json(self, url: str, cookie_config: dict | None = None, flat: bool = False) -> Dict:
         """
         Dump JSON from yt-dlp.
         flat=False  -> full metadata (preferred)
+
+        Uses the yt_dlp module in-process when it is importable (no interpreter
+        start-up or JSON round-trip per call); otherwise falls back to the
+        bundled/PATH binary. Playlists come back with "title" and "entries",
+        single tracks as-is.
         """
-        cmd = _find_ytdlp_cmd()
-        if flat:
-            cmd += ["--flat-playlist"]
-        cmd += [
-            "--dump-single-json",
-            "--no-warnings",
-            "-q",
-            url,
-        ]
-        cmd += build_ytdlp_cookie_args(cookie_config)
-
-        try:
-            proc = run_quiet(cmd, text=True, capture_output=True)
-        except FileNotFoundError as e:
-            raise RuntimeError(
-                "yt-dlp is not available. Install it with `pip install yt-dlp` "
-                "or bundle the yt-dlp binary with the app."
-            ) from e
-        if proc.returncode != 0:
-            raise RuntimeError(_format_soundcloud_ytdlp_error(proc.stderr or "", cookie_config))
-        try:
-            return json.loads(proc.stdout or "{}")
-        except Exception as e:
-            raise RuntimeError(f"Invalid JSON from yt-dlp: {e}")
-
+        global _YTDLP_MODULE_AVAILABLE
+        if _YTDLP_MODULE_AVAILABLE:
+            try:
+                return self._extract_sc_info(url, cookie_config=cookie_config, flat=flat)
+            except ImportError as e:
+                # find_spec only saw the package; a broken install fails on import.
+                # Use the binary from now on, like before the in-process path.
+                log.warning("SC: yt_dlp module unusable (%s), falling back to the yt-dlp binary", e)
+                _YTDLP_MODULE_AVAILABLE = False
+        return _merge_ytdlp_entries(self._run_ytdlp_dump([url], cookie_config, flat=flat))
+
+    def _dump_sc_json_many(self, urls: List[str], cookie_config: dict | None = None) -> List[Dict]:
+        """
+        Full metadata for several track URLs from a single yt-dlp process.
+        Tracks yt-dlp cannot fetch are skipped (--ignore-errors): the result is
+        in URL order but may be shorter than `urls`.
+        """
+        return self._run_ytdlp_dump(urls, cookie_config, ignore_errors=True)
+
+    def _run_ytdlp_dump(
+        self,
+        urls: List[str],
+        cookie_config: dict | None = None,
+        flat: bool = False,
+        ignore_errors: bool = False,
+    ) -> List[Dict]:
+        # yt-dlp prints one JSON object per track (--dump-json), parsed as it is
+        # streamed, so a large set is never buffered as one giant string.
+        cmd = list(_YTDLP_CMD)
+        if flat:
+            cmd += ["--flat-playlist"]
+        if ignore_errors:
+            cmd += ["--ignore-errors"]
+        cmd += [
+            "--dump-json",
+            "--no-warnings",
+            "-q",
+            *urls,
+        ]
+        cmd += build_ytdlp_cookie_args(cookie_config)
+
+        entries: List[Dict] = []
+        # stderr goes to a spool file so a chatty failure can't fill the pipe
+        # while we are still blocked reading stdout.
+        with tempfile.TemporaryFile("w+", encoding="utf-8", errors="replace") as err:
+            try:
+                proc = popen_quiet(cmd, stderr=err, text=True, encoding="utf-8", errors="replace")
+            except FileNotFoundError as e:
+                raise RuntimeError(
+                    "yt-dlp is not available. Install it with `pip install yt-dlp` "
+                    "or bundle the yt-dlp binary with the app."
+                ) from e
+            try:
+                for line in proc.stdout:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entries.append(_slim_info(json_loads(line)))
+                    except Exception as e:
+                        proc.kill()
+                        raise RuntimeError(f"Invalid JSON from yt-dlp: {e}")
+            finally:
+                proc.stdout.close()
+                returncode = proc.wait()
+            # with --ignore-errors a non-zero exit only means some URLs failed
+            if returncode != 0 and not (ignore_errors and entries):
+                err.seek(0)
+                raise RuntimeError(_format_soundcloud_ytdlp_error(err.read(), cookie_config))
+        return entries
+
+    def _extract_sc_info(self, url: str, cookie_config: dict | None = None, flat: bool = False) -> Dict:
+        from yt_dlp import YoutubeDL
+        from yt_dlp.utils import DownloadError
+
+        opts = {
+            "quiet": True,
+            "no_warnings": True,
+            "skip_download": True,
+            "logger": _YTDLP_LOGGER,
+            **build_ytdlp_cookie_opts(cookie_config),
+        }
+        if flat:
+            opts["extract_flat"] = "in_playlist"
+        # One YoutubeDL per call: instances are not thread-safe and the
+        # options depend on the cookie config.
+        try:
+            with YoutubeDL(opts) as ydl:
+                info = ydl.extract_info(url, download=False)
+                info = ydl.sanitize_info(info) or {}
+        except DownloadError as e:
+            raise RuntimeError(_format_soundcloud_ytdlp_error(str(e), cookie_config)) from e
+        slim = _slim_info(info)
+        if isinstance(info.get("entries"), list):
+            slim["entries"] = [_slim_info(e) for e in info["entries"]]
+        return slim
+
     def _fetch_page_hydration(self, url: str) -> Dict:
         if not _is_soundcloud_set_url(url):
             return {}
         try:
-            response = requests.get(
-                url,
-                headers={"User-Agent": "Mozilla/5.0"},
-                timeout=15,
-            )
+            response = _SESSION.get(url, timeout=15)
             response.raise_for_status()
         except Exception:
             return {}
@@ -204,14 +381,13 @@ class SoundCloudClient:
         for start in range(0, len(missing_ids), 50):
             chunk = missing_ids[start:start + 50]
             try:
-                response = requests.get(
+                response = _SESSION.get(
                     "https://api-v2.soundcloud.com/tracks",
                     params={"ids": ",".join(chunk), "client_id": client_id},
-                    headers={"User-Agent": "Mozilla/5.0"},
                     timeout=15,
                 )
                 response.raise_for_status()
-                payload = response.json()
+                payload = json_loads(response.content)
             except Exception:
                 continue
             if not isinstance(payload, list):
@@ -247,14 +423,34 @@ def _format_soundcloud_ytdlp_error(stderr: str, cookie_config: dict | None = Non
     return detail
 
 
+def _first(info: Dict, keys: tuple, default=""):
+    return next((info[k] for k in keys if info.get(k)), default)
+
+
+def _slim_info(info) -> Dict:
+    if not isinstance(info, dict):
+        return info
+    return {k: info[k] for k in _SC_INFO_FIELDS if k in info}
+
+
+def _merge_ytdlp_entries(entries: List[Dict]) -> Dict:
+    if not entries:
+        return {}
+    first = entries[0] if isinstance(entries[0], dict) else {}
+    playlist_title = first.get("playlist_title") or first.get("playlist")
+    if len(entries) == 1 and not playlist_title:
+        return first
+    return {"title": playlist_title or "", "entries": entries}
+
+
 def _extract_sc_hydration(html_text: str) -> list:
     if not html_text:
         return []
-    match = re.search(r"<script>window\.__sc_hydration\s*=\s*(.*?);</script>", html_text, re.S)
+    match = _SC_HYDRATION_RE.search(html_text)
     if not match:
         return []
     try:
-        data = json.loads(match.group(1))
+        data = json_loads(match.group(1))
     except Exception:
         return []
     return data if isinstance(data, list) else []
@@ -308,10 +504,10 @@ def _is_soundcloud_set_url(url: str) -> bool:
     if "soundcloud.com" not in low:
         return False
     try:
-        path = urlsplit(low).path.rstrip("/")
+        path = urlsplit(low).path
     except Exception:
         path = low
-    return "/sets/" in f"{path}/" or path.endswith("/sets") or "/playlists/" in f"{path}/" or path.endswith("/playlists")
+    return bool(_SC_SET_PATH_RE.search(path))
 
 
 def _title_artist_from_soundcloud_url(url: str) -> tuple[str, str]:
@@ -1,11 +1,31 @@
 # spotify_api.py
 import re
+import csv
+import json
 import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from utils import json_loads
+
 API = "https://api.spotify.com/v1"
+_PLAYLIST_TRACK_FIELDS = "items(track(id,name,artists(name),album(name),duration_ms,is_local)),next,total"
+_PLAYLIST_META_FIELDS = "name,snapshot_id,tracks.total"
+_PLAYLIST_CACHE_TTL_S = 30 * 86400
+# Stored in every cache file: bump the version when the saved track shape
+# changes; a different fields filter also invalidates older files.
+_PLAYLIST_CACHE_VERSION = 1
+_PLAYLIST_CACHE_SCHEMA = f"{_PLAYLIST_CACHE_VERSION}:{_PLAYLIST_TRACK_FIELDS}"
+_PLAYLIST_ID_MARKERS = ("open.spotify.com/playlist/", "spotify:playlist:")
+_PLAYLIST_ID_RGX = re.compile(r"(?:spotify:playlist:|open\.spotify\.com/playlist/)([A-Za-z0-9]+)")
+_ID_RGX = re.compile(r"[A-Za-z0-9]+")
+# Header written by SpotifyClient.write_csv; _csv_values yields tuples in this order.
+CSV_FIELDS = ("Track Name", "Artist Name(s)", "Album Name", "Duration (ms)")
 log = logging.getLogger(__name__)
 
 def _chunks(lst, n):
@@ -16,12 +36,13 @@ def _retrying_session(
     total=5,
     backoff_factor=0.5,
     status_forcelist=(429, 500, 502, 503, 504),
-    methods=frozenset(["HEAD", "GET", "OPTIONS", "POST"])
+    methods=frozenset(["HEAD", "GET", "OPTIONS"]),
+    read=None,
 ):
     s = requests.Session()
     r = Retry(
         total=total,
-        read=total,
+        read=total if read is None else read,
         connect=total,
         backoff_factor=backoff_factor,
         status_forcelist=status_forcelist,
@@ -41,10 +62,15 @@ def _retrying_session(
     return s
 
 _SESSION = _retrying_session()
+# create_playlist/add_tracks_to_playlist are not idempotent: a 5xx or a read
+# timeout may come after Spotify applied them, so only 429 (rejected before
+# processing, safe to replay after Retry-After) is retried.
+_POST_SESSION = _retrying_session(status_forcelist=(429,), methods=frozenset(["POST"]), read=0)
 
 class SpotifyClient:
     """
     token_supplier: callable -> str (access_token)
+    cache_dir: optional folder where playlist tracks are cached per snapshot_id
     """
     _RGX = re.compile(
         r"spotify:(?P<kind>track|album|artist|playlist):(?P<id>[A-Za-z0-9]+)|"
@@ -55,25 +81,42 @@ class SpotifyClient:
     def extract_playlist_id(s: str | None) -> str | None:
         if not s:
             return None
-        m = re.search(r"(?:spotify:playlist:|open\.spotify\.com/playlist/)([A-Za-z0-9]+)", s)
+        # Literal marker + anchored id match covers every normal link/URI.
+        for marker in _PLAYLIST_ID_MARKERS:
+            _, sep, tail = s.partition(marker)
+            if sep:
+                m = _ID_RGX.match(tail)
+                if m:
+                    return m.group(0)
+        m = _PLAYLIST_ID_RGX.search(s)
         return m.group(1) if m else None
 
-    def _parse_spotify_id(self, s):
-        m = self._RGX.search(s or "")
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _parse_spotify_id(s):
+        m = SpotifyClient._RGX.search(s or "")
         if not m:
             return (None, None)
         kind = m.group("kind") or m.group("kind2")
         ident = m.group("id") or m.group("id2")
         return (kind, ident)
 
-    def __init__(self, token_supplier):
+    def __init__(self, token_supplier, cache_dir=None):
         if not callable(token_supplier):
             raise ValueError("token_supplier must be callable")
         self._token_supplier = token_supplier
+        self._cache_dir = cache_dir
+        self._auth = (None, {})  # (token, headers) swapped as one tuple
 
     # ---------------- HTTP ----------------
     def _headers(self):
-        return {"Authorization": f"Bearer {self._token_supplier()}"}
+        # The supplier returns the same cached token for an hour: reuse the header dict.
+        token = self._token_supplier()
+        cached_token, headers = self._auth
+        if token != cached_token:
+            headers = {"Authorization": f"Bearer {token}"}
+            self._auth = (token, headers)
+        return headers
 
     def _get(self, url, params=None, _retry401=True):
         r = _SESSION.get(url, headers=self._headers(), params=params)
@@ -85,19 +128,55 @@ class SpotifyClient:
                 log.warning("Token supplier refresh raised: %s", e)
             r = _SESSION.get(url, headers=self._headers(), params=params)
         r.raise_for_status()
-        return r.json()
+        return json_loads(r.content)
+
+    def _parallel_get(self, url, params_list, max_workers=4):
+        """GET `url` once per params dict concurrently; results keep params_list order."""
+        params_list = list(params_list)
+        if len(params_list) <= 1:
+            return [self._get(url, params=p) for p in params_list]
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(lambda p: self._get(url, params=p), params_list))
+
+    def _paged_items(self, url, limit, params=None, max_workers=4, total=None):
+        """
+        All "items" of a paged endpoint. The first page gives the total, so the
+        remaining offsets are requested concurrently instead of waiting on each
+        "next" link in turn; endpoints without a total follow "next".
+        A `total` already known by the caller lets every page, the first one
+        included, go out in the same concurrent round.
+        """
+        params = params or {}
+        if isinstance(total, int):
+            params_list = [{"limit": limit, "offset": off, **params} for off in range(0, total, limit)]
+            items = []
+            for page in self._parallel_get(url, params_list, max_workers=max_workers):
+                items.extend(page.get("items", []))
+            return items
+        page = self._get(url, params={"limit": limit, **params})
+        items = list(page.get("items", []))
+        total = page.get("total")
+        if page.get("next") and isinstance(total, int):
+            params_list = [{"limit": limit, "offset": off, **params} for off in range(limit, total, limit)]
+            for page in self._parallel_get(url, params_list, max_workers=max_workers):
+                items.extend(page.get("items", []))
+        else:
+            while page.get("next"):
+                page = self._get(page["next"])
+                items.extend(page.get("items", []))
+        return items
 
     def _post(self, url, json_body=None, _retry401=True):
-        r = _SESSION.post(url, headers=self._headers(), json=json_body)
+        r = _POST_SESSION.post(url, headers=self._headers(), json=json_body)
         if r.status_code == 401 and _retry401:
             log.info("401 on POST — attempting token refresh and retry.")
             try:
                 _ = self._token_supplier()
             except Exception as e:
                 log.warning("Token supplier refresh raised: %s", e)
-            r = _SESSION.post(url, headers=self._headers(), json=json_body)
+            r = _POST_SESSION.post(url, headers=self._headers(), json=json_body)
         r.raise_for_status()
-        return r.json()
+        return json_loads(r.content)
 
     # ------------- Resolvers --------------
     def resolve(self, url_or_uri):
@@ -118,22 +197,13 @@ class SpotifyClient:
     def track(self, track_id):
         return self._get(f"{API}/tracks/{track_id}")
 
-    def album_tracks(self, album_id):
-        items = []
-        url = f"{API}/albums/{album_id}/tracks"
-        params = {"limit": 50, "offset": 0}
-        while True:
-            page = self._get(url, params=params)
-            items.extend(page.get("items", []))
-            if page.get("next"):
-                params["offset"] += params["limit"]
-            else:
-                break
+    def album_tracks(self, album_id, max_workers=4):
+        items = self._paged_items(f"{API}/albums/{album_id}/tracks", 50, max_workers=max_workers)
 
         album = self._get(f"{API}/albums/{album_id}")
         album_name = album.get("name")
         arts = album.get("artists") or []
-        album_artists = [a.get("name") for a in arts if a.get("name")]
+        album_artists = [n for a in arts if (n := a.get("name"))]
 
         out = []
         for tr in items:
@@ -146,33 +216,19 @@ class SpotifyClient:
             })
         return out
 
-    def playlist_tracks(self, playlist_id):
-        fields = "items(track(id,name,artists(name),album(name),duration_ms,is_local)),next"
-        url = f"{API}/playlists/{playlist_id}/tracks"
-        params = {"limit": 100, "fields": fields}
-        items = []
-        while True:
-            page = self._get(url, params=params)
-            items.extend(page.get("items", []))
-            next_url = page.get("next")
-            if next_url:
-                url = next_url
-                params = None
-            else:
-                break
+    def playlist_tracks(self, playlist_id, max_workers=4, total=None):
+        items = self._paged_items(
+            f"{API}/playlists/{playlist_id}/tracks", 100,
+            params={"fields": _PLAYLIST_TRACK_FIELDS}, max_workers=max_workers, total=total,
+        )
 
+        # _PLAYLIST_TRACK_FIELDS already trims each track to the keys rows read,
+        # so the parsed dicts are kept as-is instead of being copied per track.
         out = []
         for it in items:
-            tr = it.get("track") or {}
-            if not tr or tr.get("is_local"):
-                continue
-            out.append({
-                "id": tr.get("id"),
-                "name": tr.get("name"),
-                "duration_ms": tr.get("duration_ms"),
-                "album": {"name": (tr.get("album") or {}).get("name")},
-                "artists": (tr.get("artists") or []),
-            })
+            tr = it.get("track")
+            if tr and not tr.get("is_local"):
+                out.append(tr)
         return out
 
     def artist_top_tracks(self, artist_id, market="US"):
@@ -190,13 +246,15 @@ class SpotifyClient:
         return out
 
     # ------------- Batch lookups ----------
-    def tracks(self, track_ids):
-        out = []
+    def tracks(self, track_ids, max_workers=4):
         ids = list(track_ids or [])
-        for chunk in _chunks(ids, 50):
-            data = self._get(f"{API}/tracks", params={"ids": ",".join(chunk)})
-            out.extend(data.get("tracks") or [])
-        return out
+        # Playlists often repeat tracks: look each id up once, then fan back out.
+        chunks = list(_chunks(list(dict.fromkeys(ids)), 50))
+        params_list = [{"ids": ",".join(chunk)} for chunk in chunks]
+        by_id = {}
+        for chunk, data in zip(chunks, self._parallel_get(f"{API}/tracks", params_list, max_workers=max_workers)):
+            by_id.update(zip(chunk, data.get("tracks") or []))
+        return [by_id.get(tid) for tid in ids]
 
     # --------- Playlists utils (+GUI) ----
     def current_user_id(self):
@@ -220,26 +278,125 @@ class SpotifyClient:
         return self._post(f"{API}/playlists/{playlist_id}/tracks", json_body=body)
 
     def fetch_playlist(self, playlist_id: str):
-        meta = self._get(f"{API}/playlists/{playlist_id}", params={"fields": "name"})
-        name = meta.get("name")
-        tracks = self.playlist_tracks(playlist_id)
+        tracks, name = self.fetch_playlist_tracks(playlist_id)
         rows, _ = self.to_csv_rows(tracks, playlist_name=name)
         return rows, name
 
+    def fetch_playlist_tracks(self, playlist_id: str):
+        """Returns (track dicts, name); pair with write_csv to skip the row dicts."""
+        # tracks.total rides along with the metadata, so on a cache miss all
+        # track pages can be requested at once.
+        meta = self._get(f"{API}/playlists/{playlist_id}", params={"fields": _PLAYLIST_META_FIELDS})
+        name = meta.get("name")
+        total = (meta.get("tracks") or {}).get("total")
+        return self._cached_playlist_tracks(playlist_id, meta.get("snapshot_id"), total), name
+
+    # -------------- Playlist cache -------
+    def _cached_playlist_tracks(self, playlist_id, snapshot_id, total=None):
+        """
+        Spotify bumps snapshot_id on every playlist edit, so tracks saved under
+        the same snapshot are still exact: reuse them and skip all paging.
+        """
+        if not (self._cache_dir and snapshot_id):
+            return self.playlist_tracks(playlist_id, total=total)
+        path = os.path.join(self._cache_dir, f"playlist_{playlist_id}.json")
+        try:
+            with open(path, "rb") as f:
+                cached = json_loads(f.read())
+            if (cached.get("schema") == _PLAYLIST_CACHE_SCHEMA
+                    and cached.get("snapshot_id") == snapshot_id
+                    and time.time() - float(cached.get("saved_at") or 0) < _PLAYLIST_CACHE_TTL_S):
+                log.info("Spotify playlist %s unchanged (snapshot %s), using cache.", playlist_id, snapshot_id)
+                return cached["tracks"]
+            stale = True  # older snapshot or schema, or past the TTL
+        except FileNotFoundError:
+            stale = False
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            stale = True  # unreadable or foreign payload
+        if stale:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+        tracks = self.playlist_tracks(playlist_id, total=total)
+        try:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"schema": _PLAYLIST_CACHE_SCHEMA, "snapshot_id": snapshot_id,
+                           "saved_at": time.time(), "tracks": tracks}, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            log.debug("Spotify playlist cache write failed: %s", e)
+        self._prune_playlist_cache()
+        return tracks
+
+    def _prune_playlist_cache(self):
+        """
+        Delete cache files past the TTL. Playlists that are never loaded again
+        would otherwise stay on disk forever; runs on cache writes only.
+        """
+        cutoff = time.time() - _PLAYLIST_CACHE_TTL_S
+        try:
+            with os.scandir(self._cache_dir) as it:
+                for entry in it:
+                    if not (entry.name.startswith("playlist_") and entry.name.endswith((".json", ".json.tmp"))):
+                        continue
+                    try:
+                        if entry.stat().st_mtime < cutoff:
+                            os.remove(entry.path)
+                    except OSError:
+                        pass
+        except OSError as e:
+            log.debug("Spotify playlist cache prune failed: %s", e)
+
     # -------------- CSV helper -----------
     def to_csv_rows(self, track_dicts, playlist_name=None):
-        rows = []
-        for tr in track_dicts or []:
+        rows = [
+            {"Track Name": title, "Artist Name(s)": artists, "Album Name": album, "Duration (ms)": dur}
+            for title, artists, album, dur in self._csv_values(track_dicts)
+        ]
+        return rows, (playlist_name or "")
+
+    def write_csv(self, track_dicts, f) -> int:
+        """Write CSV_FIELDS then one line per track to `f`; returns the row count."""
+        writer = csv.writer(f)
+        writer.writerow(CSV_FIELDS)
+        count = 0
+        for values in self._csv_values(track_dicts):
+            writer.writerow(values)
+            count += 1
+        return count
+
+    @staticmethod
+    def _csv_values(track_dicts):
+        # one CSV_FIELDS-ordered tuple per track
+        for tr in track_dicts or ():
             if not tr:
                 continue
             title = tr.get("name") or ""
             album = (tr.get("album") or {}).get("name") or ""
-            artists = ", ".join([a.get("name") for a in (tr.get("artists") or []) if a.get("name")])
+            artists = ", ".join(n for a in tr.get("artists") or () if (n := a.get("name")))
             dur = tr.get("duration_ms") or ""
-            rows.append({
-                "Track Name": title,
-                "Artist Name(s)": artists or "Unknown",
-                "Album Name": album,
-                "Duration (ms)": dur
-            })
-        return rows, (playlist_name or "")
+            yield (title, artists or "Unknown", album, dur)
+
+
+@lru_cache(maxsize=4)
+def shared_client(client_id: str) -> SpotifyClient:
+    """
+    The app's SpotifyClient for `client_id`: PKCE auth with the refresh token in
+    the keyring and the playlist cache in the user cache dir. Shared by the Qt
+    and Tk loaders so later loads reuse the access token.
+    """
+    from config import user_cache_dir
+    from spotify_auth import PKCEAuth
+    from token_store import RefreshTokenStore
+
+    auth = PKCEAuth(
+        client_id=client_id,
+        redirect_uri="http://127.0.0.1:8765/callback",
+        scopes=["playlist-read-private", "playlist-read-collaborative"],
+        refresh_token_store=RefreshTokenStore(service="Music2MP3", user="spotify_pkce"),
+    )
+    return SpotifyClient(token_supplier=auth.get_token, cache_dir=user_cache_dir("spotify"))
@@ -1,8 +1,9 @@
 # spotify_auth.py
-import base64, hashlib, os, time, threading, webbrowser
-from http.server import BaseHTTPRequestHandler, HTTPServer
+# webbrowser, http.server and requests are imported where they are used: a
+# returning user with a valid token never opens the callback server, and the
+# HTTP stack is only needed once a token has to be fetched.
+import base64, hashlib, os, time, threading
 import urllib.parse as urlparse
-import requests
 
 SPOTIFY_AUTH_URL = "https://accounts.spotify.com/authorize"
 SPOTIFY_TOKEN_URL = "https://accounts.spotify.com/api/token"
@@ -17,32 +18,76 @@ class PKCEAuth:
         self._refresh_token = refresh_token_store.get() if refresh_token_store else None
         self._expires_at = 0
         self._store = refresh_token_store
-        self._auth_timeout_sec = max(15, int(auth_timeout_sec))
+        self._auth_timeout_sec = max(15, int(auth_timeout_sec))
+        self._lock = threading.Lock()
+        self._session = None
 
-    def get_token(self) -> str:
-        now = time.time()
-        if self._access_token and now < self._expires_at - 30:
-            return self._access_token
-        if self._refresh_token:
-            try:
-                self._refresh()
-                return self._access_token
-            except Exception:
-                # Refresh token may be revoked/expired. Fall back to full PKCE auth.
-                self._refresh_token = None
-        self._authorize()
-        return self._access_token
+    def _token_session(self):
+        # One pooled connection to accounts.spotify.com, reused by the initial
+        # code exchange and every hourly refresh. Connection failures and
+        # transient 5xx are retried: if a replayed refresh is refused because
+        # the first one went through, get_token falls back to _authorize().
+        # No 429 retries (token quota) and no read retries (20 s timeout each).
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            s = requests.Session()
+            s.mount("https://", HTTPAdapter(
+                pool_connections=1, pool_maxsize=2,
+                max_retries=Retry(
+                    total=3, connect=3, read=0, backoff_factor=0.3,
+                    status_forcelist=(500, 502, 503, 504),
+                    allowed_methods=frozenset(["POST"]),
+                    respect_retry_after_header=False,
+                    raise_on_status=False,
+                ),
+            ))
+            self._session = s
+        return self._session
+
+    def _cached_token(self):
+        if self._access_token and time.time() < self._expires_at - 30:
+            return self._access_token
+        return None
+
+    def get_token(self) -> str:
+        token = self._cached_token()
+        if token:
+            return token
+        # Paged fetches ask for the token from several threads at once:
+        # only the first one refreshes (or opens the browser), the others wait.
+        with self._lock:
+            token = self._cached_token()
+            if token:
+                return token
+            if self._refresh_token:
+                try:
+                    self._refresh()
+                    return self._access_token
+                except Exception:
+                    # Refresh token may be revoked/expired. Fall back to full PKCE auth.
+                    self._refresh_token = None
+            self._authorize()
+            return self._access_token
 
     # ---- internals ----
     def _make_verifier_challenge(self):
-        verifier = base64.urlsafe_b64encode(os.urandom(64)).rstrip(b"=").decode()
-        digest = hashlib.sha256(verifier.encode()).digest()
+        # Hash the base64url bytes directly: no str round-trip before sha256.
+        verifier = base64.urlsafe_b64encode(os.urandom(64)).rstrip(b"=")
+        digest = hashlib.sha256(verifier).digest()
         challenge = base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
-        return verifier, challenge
+        return verifier.decode(), challenge
 
     def _authorize(self):
+        import webbrowser
+        from http.server import BaseHTTPRequestHandler, HTTPServer
+
         verifier, challenge = self._make_verifier_challenge()
         code_holder = {}
+        redirect = urlparse.urlparse(self.redirect_uri)
+        redirect_path = redirect.path
 
         class Handler(BaseHTTPRequestHandler):
             def log_message(self_inner, _format, *_args):
@@ -51,7 +96,7 @@ class PKCEAuth:
 
             def do_GET(self_inner):
                 parsed = urlparse.urlparse(self_inner.path)
-                if parsed.path != urlparse.urlparse(self.redirect_uri).path:
+                if parsed.path != redirect_path:
                     self_inner.send_response(404); self_inner.end_headers(); return
                 qs = urlparse.parse_qs(parsed.query)
                 if "code" in qs:
@@ -69,8 +114,8 @@ class PKCEAuth:
                 else:
                     self_inner.send_response(400); self_inner.end_headers()
 
-        host = urlparse.urlparse(self.redirect_uri).hostname
-        port = urlparse.urlparse(self.redirect_uri).port or 8765
+        host = redirect.hostname
+        port = redirect.port or 8765
         try:
             httpd = HTTPServer((host, port), Handler)
         except OSError as e:
@@ -78,8 +123,6 @@ class PKCEAuth:
                 f"Spotify callback server could not start on {host}:{port}. "
                 "Close the app using that port or retry later."
             ) from e
-        t = threading.Thread(target=httpd.serve_forever, daemon=True)
-        t.start()
 
         try:
             params = {
@@ -92,19 +135,21 @@ class PKCEAuth:
             }
             webbrowser.open(f"{SPOTIFY_AUTH_URL}?{urlparse.urlencode(params)}")
 
+            # Serve the callback from this thread: handle_request() blocks until a
+            # request arrives (no polling). Browsers may also hit /favicon.ico or
+            # open idle preconnections, so keep serving until the redirect lands;
+            # both waits are bounded by the remaining auth time.
             deadline = time.time() + self._auth_timeout_sec
             while "code" not in code_holder and "error" not in code_holder:
-                if time.time() >= deadline:
+                remaining = deadline - time.time()
+                if remaining <= 0:
                     raise TimeoutError(
                         f"Spotify authorization timed out after {self._auth_timeout_sec}s. "
                         "Please complete sign-in in browser and retry."
                     )
-                time.sleep(0.1)
+                httpd.timeout = Handler.timeout = remaining
+                httpd.handle_request()
         finally:
-            try:
-                httpd.shutdown()
-            except Exception:
-                pass
             try:
                 httpd.server_close()
             except Exception:
@@ -120,7 +165,7 @@ class PKCEAuth:
             "redirect_uri": self.redirect_uri,
             "code_verifier": verifier
         }
-        r = requests.post(SPOTIFY_TOKEN_URL, data=data, timeout=20)
+        r = self._token_session().post(SPOTIFY_TOKEN_URL, data=data, timeout=20)
         r.raise_for_status()
         tok = r.json()
         self._set_tokens(tok)
@@ -131,7 +176,7 @@ class PKCEAuth:
             "grant_type": "refresh_token",
             "refresh_token": self._refresh_token
         }
-        r = requests.post(SPOTIFY_TOKEN_URL, data=data, timeout=20)
+        r = self._token_session().post(SPOTIFY_TOKEN_URL, data=data, timeout=20)
         r.raise_for_status()
         tok = r.json()
         if "refresh_token" not in tok:
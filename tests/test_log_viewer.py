@@ -0,0 +1,86 @@
+import tkinter as tk
+import unittest
+from collections import deque
+from unittest.mock import patch
+
+import log_viewer
+from log_viewer import LogWindow
+
+
+def _row(msg: str, level: str = "INFO") -> tuple:
+    return ("2026-10-16 10:00:00", level, "tests", msg)
+
+
+class LogWindowTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        try:
+            cls.root = tk.Tk()
+        except tk.TclError as exc:  # pragma: no cover - depends on a display
+            raise unittest.SkipTest(f"Tk is not available: {exc}") from exc
+        cls.root.withdraw()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.root.destroy()
+
+    def setUp(self):
+        self.win = LogWindow(self.root, deque())
+        self.addCleanup(self.win.destroy)
+
+    def _fill_past_threshold(self):
+        with patch.object(log_viewer, "_TREE_THRESHOLD", 3):
+            for msg in ("alpha", "beta", "gamma"):
+                self.win._append_line(_row(msg))
+
+    def test_text_view_until_threshold(self):
+        with patch.object(log_viewer, "_TREE_THRESHOLD", 3):
+            self.win._append_line(_row("alpha"))
+            self.win._append_line(_row("beta"))
+
+        self.assertFalse(self.win._tree_mode)
+        self.assertIsNone(self.win.tree)
+        self.assertIn("beta", self.win.text.get("1.0", "end"))
+
+    def test_switches_to_tree_past_threshold(self):
+        self._fill_past_threshold()
+        self.win._append_line(_row("delta\nmore", "ERROR"))
+
+        self.assertTrue(self.win._tree_mode)
+        self.assertTrue(self.win.tree.grid_info())
+        self.assertFalse(self.win.text.grid_info())
+        self.assertEqual(self.win.text.get("1.0", "end").strip(), "")
+        messages = [self.win.tree.item(i, "values")[3] for i in self.win.tree.get_children()]
+        self.assertEqual(messages, ["alpha", "beta", "gamma", "delta | more"])
+
+    def test_search_finds_rows_in_tree_mode(self):
+        self._fill_past_threshold()
+
+        self.win.search_var.set("BETA")
+        self.win._find_next()
+        selected = self.win.tree.selection()
+        self.assertEqual(len(selected), 1)
+        self.assertEqual(self.win.tree.item(selected[0], "values")[3], "beta")
+
+        # next match wraps around from the selected row
+        self.win.search_var.set("a")
+        self.win._find_next()
+        self.assertEqual(self.win.tree.item(self.win.tree.selection()[0], "values")[3], "gamma")
+        self.win._find_next()
+        self.assertEqual(self.win.tree.item(self.win.tree.selection()[0], "values")[3], "alpha")
+
+    def test_clear_restores_text_view(self):
+        self._fill_past_threshold()
+
+        self.win._clear()
+
+        self.assertFalse(self.win._tree_mode)
+        self.assertTrue(self.win.text.grid_info())
+        self.assertFalse(self.win.tree.grid_info())
+        self.assertEqual(self.win.tree.get_children(), ())
+        self.win._append_line(_row("after clear"))
+        self.assertIn("after clear", self.win.text.get("1.0", "end"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,47 @@
+import contextlib
+import io
+import json
+import sys
+import types
 import unittest
 from unittest.mock import patch
 
-from soundcloud_api import SoundCloudClient, _extract_sc_client_id, _extract_sc_hydration, _find_ytdlp_cmd
+import soundcloud_api
+from soundcloud_api import (
+    SoundCloudClient,
+    _extract_sc_client_id,
+    _extract_sc_hydration,
+    _find_ytdlp_cmd,
+    _is_soundcloud_set_url,
+)
+
+
+@contextlib.contextmanager
+def _fake_yt_dlp(youtube_dl, download_error=Exception):
+    """Stand-in yt_dlp package for the in-process path (imported lazily)."""
+    yt_dlp = types.ModuleType("yt_dlp")
+    yt_dlp.YoutubeDL = youtube_dl
+    utils = types.ModuleType("yt_dlp.utils")
+    utils.DownloadError = download_error
+    yt_dlp.utils = utils
+    with patch.dict(sys.modules, {"yt_dlp": yt_dlp, "yt_dlp.utils": utils}), patch(
+        "soundcloud_api._YTDLP_MODULE_AVAILABLE", True
+    ):
+        yield
+
+
+class _FakeYtdlpProc:
+    def __init__(self, stdout="", stderr="", returncode=0, stderr_file=None):
+        self.stdout = io.StringIO(stdout)
+        self.returncode = returncode
+        if stderr_file is not None:
+            stderr_file.write(stderr)
+
+    def wait(self, timeout=None):
+        return self.returncode
+
+    def kill(self):
+        pass
 
 
 class SoundCloudApiTests(unittest.TestCase):
@@ -71,19 +111,14 @@ class SoundCloudApiTests(unittest.TestCase):
         self.assertEqual(row["Track URI"], "soundcloud:track:123")
 
     def test_dump_json_uses_browser_cookie_auth(self):
-        class FakeProc:
-            returncode = 0
-            stdout = '{"title": "Track"}'
-            stderr = ""
-
         captured = {}
 
-        def fake_run_quiet(cmd, **_kwargs):
+        def fake_popen_quiet(cmd, **_kwargs):
             captured["cmd"] = cmd
-            return FakeProc()
+            return _FakeYtdlpProc('{"title": "Track"}\n')
 
         client = SoundCloudClient()
-        with patch("soundcloud_api.run_quiet", side_effect=fake_run_quiet):
+        with patch("soundcloud_api._YTDLP_MODULE_AVAILABLE", False), patch("soundcloud_api.popen_quiet", side_effect=fake_popen_quiet):
             client._dump_sc_json(
                 "https://soundcloud.com/a/track",
                 cookie_config={"cookies_from_browser": "safari"},
@@ -97,13 +132,15 @@ class SoundCloudApiTests(unittest.TestCase):
             self.assertEqual(_find_ytdlp_cmd(), ["/tmp/python", "-m", "yt_dlp"])
 
     def test_dump_json_403_error_explains_browser_auth(self):
-        class FakeProc:
-            returncode = 1
-            stdout = ""
-            stderr = "ERROR: [soundcloud:set] Unable to download JSON metadata: HTTP Error 403: Forbidden"
+        def fake_popen_quiet(_cmd, **kwargs):
+            return _FakeYtdlpProc(
+                stderr="ERROR: [soundcloud:set] Unable to download JSON metadata: HTTP Error 403: Forbidden",
+                returncode=1,
+                stderr_file=kwargs["stderr"],
+            )
 
         client = SoundCloudClient()
-        with patch("soundcloud_api.run_quiet", return_value=FakeProc()):
+        with patch("soundcloud_api._YTDLP_MODULE_AVAILABLE", False), patch("soundcloud_api.popen_quiet", side_effect=fake_popen_quiet):
             with self.assertRaises(RuntimeError) as ctx:
                 client._dump_sc_json("https://soundcloud.com/a/sets/private")
 
@@ -112,6 +149,181 @@ class SoundCloudApiTests(unittest.TestCase):
         self.assertIn("Browser auth", msg)
         self.assertIn("HTTP Error 403", msg)
 
+    def test_dump_json_streams_playlist_entries_per_line(self):
+        stdout = (
+            '{"title": "One", "uploader": "A", "playlist_title": "Set"}\n'
+            '\n'
+            '{"title": "Two", "uploader": "B", "playlist_title": "Set"}\n'
+        )
+        client = SoundCloudClient()
+        with patch("soundcloud_api._YTDLP_MODULE_AVAILABLE", False), patch("soundcloud_api.popen_quiet", return_value=_FakeYtdlpProc(stdout)):
+            data = client._dump_sc_json("https://soundcloud.com/a/sets/demo")
+
+        self.assertEqual(data["title"], "Set")
+        self.assertEqual([e["title"] for e in data["entries"]], ["One", "Two"])
+
+    def test_dump_json_drops_fields_rows_never_read(self):
+        stdout = '{"title": "Solo", "uploader": "A", "formats": [{"url": "x"}], "thumbnails": []}\n'
+        client = SoundCloudClient()
+        with patch("soundcloud_api._YTDLP_MODULE_AVAILABLE", False), patch("soundcloud_api.popen_quiet", return_value=_FakeYtdlpProc(stdout)):
+            data = client._dump_sc_json("https://soundcloud.com/a/solo")
+
+        self.assertEqual(data, {"title": "Solo", "uploader": "A"})
+
+    def test_dump_json_returns_single_track_as_is(self):
+        client = SoundCloudClient()
+        with patch("soundcloud_api._YTDLP_MODULE_AVAILABLE", False), patch("soundcloud_api.popen_quiet", return_value=_FakeYtdlpProc('{"title": "Solo", "playlist": null}\n')):
+            data = client._dump_sc_json("https://soundcloud.com/a/solo")
+
+        self.assertEqual(data, {"title": "Solo", "playlist": None})
+
+    def test_dump_json_uses_embedded_ytdlp_with_cookie_opts(self):
+        captured = {}
+
+        class FakeYoutubeDL:
+            def __init__(self, opts):
+                captured["opts"] = opts
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *_exc):
+                return False
+
+            def extract_info(self, url, download=True):
+                captured["url"], captured["download"] = url, download
+                return {"title": "Set", "entries": [{"title": "One"}]}
+
+            def sanitize_info(self, info):
+                return info
+
+        client = SoundCloudClient()
+        with _fake_yt_dlp(FakeYoutubeDL), patch("soundcloud_api.popen_quiet") as popen_mock:
+            data = client._dump_sc_json(
+                "https://soundcloud.com/a/sets/demo",
+                cookie_config={"cookies_from_browser": "Firefox", "cookies_browser_profile": "work"},
+                flat=True,
+            )
+
+        popen_mock.assert_not_called()
+        self.assertEqual(data["entries"][0]["title"], "One")
+        self.assertFalse(captured["download"])
+        self.assertEqual(captured["opts"]["extract_flat"], "in_playlist")
+        self.assertEqual(captured["opts"]["cookiesfrombrowser"], ("firefox", "work", None, None))
+        with self.assertLogs("soundcloud_api", level="ERROR"):
+            captured["opts"]["logger"].error("ERROR: [soundcloud] demo: boom")
+
+    def test_dump_json_falls_back_to_binary_when_yt_dlp_import_fails(self):
+        client = SoundCloudClient()
+        with patch.dict(sys.modules, {"yt_dlp": None}), patch(
+            "soundcloud_api._YTDLP_MODULE_AVAILABLE", True
+        ), patch("soundcloud_api.popen_quiet", return_value=_FakeYtdlpProc('{"title": "Solo"}\n')) as popen_mock:
+            with self.assertLogs("soundcloud_api", level="WARNING"):
+                data = client._dump_sc_json("https://soundcloud.com/a/solo")
+            self.assertEqual(data, {"title": "Solo"})
+            popen_mock.assert_called_once()
+            self.assertFalse(soundcloud_api._YTDLP_MODULE_AVAILABLE)
+
+    def test_dump_json_embedded_error_explains_browser_auth(self):
+        class FakeDownloadError(Exception):
+            pass
+
+        class FakeYoutubeDL:
+            def __init__(self, _opts):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *_exc):
+                return False
+
+            def extract_info(self, _url, download=True):
+                raise FakeDownloadError("ERROR: Unable to download JSON metadata: HTTP Error 403: Forbidden")
+
+        client = SoundCloudClient()
+        with _fake_yt_dlp(FakeYoutubeDL, FakeDownloadError):
+            with self.assertRaisesRegex(RuntimeError, "SoundCloud blocked metadata access"):
+                client._dump_sc_json("https://soundcloud.com/a/sets/private")
+
+    def test_fetch_playlist_enriches_semi_flat_entries_in_order(self):
+        flat = {
+            "title": "Set",
+            "entries": [
+                {"url": "https://soundcloud.com/a/one"},
+                {"title": "Full", "uploader": "Already"},
+                {"url": "https://soundcloud.com/a/broken"},
+                {"url": "https://soundcloud.com/a/three"},
+            ],
+        }
+
+        def fake_dump(track_url, cookie_config=None, flat=False):
+            if track_url.endswith("broken"):
+                raise RuntimeError("403")
+            name = track_url.rsplit("/", 1)[-1]
+            return {"title": name.title(), "uploader": "Artist", "webpage_url": track_url}
+
+        client = SoundCloudClient()
+        with patch("soundcloud_api._YTDLP_MODULE_AVAILABLE", True), patch.object(
+            client, "_fetch_with_ytdlp", return_value=flat
+        ), patch.object(client, "_dump_sc_json", side_effect=fake_dump) as dump_mock:
+            rows, name = client.fetch_playlist("https://soundcloud.com/a/track-not-set", max_workers=3)
+
+        self.assertEqual(name, "Set")
+        self.assertEqual(dump_mock.call_count, 3)
+        self.assertEqual([r["Track Name"] for r in rows], ["One", "Full", "broken", "Three"])
+
+    def test_fetch_playlist_enriches_with_one_ytdlp_process_per_batch(self):
+        flat = {
+            "title": "Set",
+            "entries": [
+                {"url": "https://soundcloud.com/a/one"},
+                {"title": "Full", "uploader": "Already"},
+                {"url": "https://soundcloud.com/a/broken"},
+                {"id": 3, "url": "https://soundcloud.com/a/three"},
+                {"url": "https://soundcloud.com/a/one"},
+            ],
+        }
+        # yt-dlp skips the broken URL and reports "three" under a redirected URL
+        stdout = (
+            '{"title": "One", "uploader": "A", "original_url": "https://soundcloud.com/a/one"}\n'
+            '{"id": 3, "title": "Three", "uploader": "C", "original_url": "https://soundcloud.com/a/three-moved"}\n'
+        )
+        commands = []
+
+        def fake_popen_quiet(cmd, **_kwargs):
+            commands.append(cmd)
+            return _FakeYtdlpProc(stdout, stderr="ERROR: broken", returncode=1, stderr_file=_kwargs.get("stderr"))
+
+        client = SoundCloudClient()
+        with patch("soundcloud_api._YTDLP_MODULE_AVAILABLE", False), patch.object(
+            client, "_fetch_with_ytdlp", return_value=flat
+        ), patch("soundcloud_api.popen_quiet", side_effect=fake_popen_quiet):
+            rows, _name = client.fetch_playlist("https://soundcloud.com/a/track-not-set", max_workers=1)
+
+        self.assertEqual(len(commands), 1)
+        self.assertIn("--ignore-errors", commands[0])
+        self.assertEqual(
+            [u for u in commands[0] if u.startswith("https://")],
+            ["https://soundcloud.com/a/one", "https://soundcloud.com/a/broken", "https://soundcloud.com/a/three"],
+        )
+        self.assertEqual([r["Track Name"] for r in rows], ["One", "Full", "broken", "Three", "One"])
+
+    def test_looks_full_needs_title_and_some_artist_field(self):
+        client = SoundCloudClient()
+
+        self.assertFalse(client._looks_full({"uploader": "A", "url": "https://soundcloud.com/a/x"}))
+        self.assertFalse(client._looks_full({"title": "X", "user": "not-a-dict"}))
+        self.assertTrue(client._looks_full({"title": "X", "creator": "A"}))
+        self.assertTrue(client._looks_full({"title": "X", "user": {"permalink": "a"}}))
+
+    def test_fetch_playlist_flat_lists_set_flat_first(self):
+        client = SoundCloudClient()
+        with patch.object(client, "_dump_sc_json", return_value={"title": "Solo", "uploader": "A"}) as dump_mock:
+            client.fetch_playlist("https://soundcloud.com/a/solo", flat=True)
+
+        self.assertTrue(dump_mock.call_args.kwargs["flat"])
+
     def test_fetch_playlist_falls_back_to_page_hydration_after_ytdlp_403(self):
         class FakeResponse:
             text = (
@@ -126,7 +338,7 @@ class SoundCloudApiTests(unittest.TestCase):
 
         client = SoundCloudClient()
         with patch.object(client, "_dump_sc_json", side_effect=RuntimeError("403")), patch(
-            "soundcloud_api.requests.get",
+            "soundcloud_api._SESSION.get",
             return_value=FakeResponse(),
         ):
             rows, name = client.fetch_playlist("https://soundcloud.com/a/sets/demo")
@@ -149,15 +361,15 @@ class SoundCloudApiTests(unittest.TestCase):
 
         api_response = type("FakeResponse", (), {})()
         api_response.raise_for_status = lambda: None
-        api_response.json = lambda: [{
+        api_response.content = json.dumps([{
             "id": 123,
             "title": "Resolved Track",
             "duration": 123400,
             "permalink_url": "https://soundcloud.com/a/resolved",
             "user": {"username": "Resolved Artist"},
-        }]
+        }]).encode()
 
-        with patch("soundcloud_api.requests.get", side_effect=[html_response, api_response]):
+        with patch("soundcloud_api._SESSION.get", side_effect=[html_response, api_response]):
             rows, name = SoundCloudClient().fetch_playlist("https://soundcloud.com/a/sets/demo")
 
         self.assertEqual(name, "Page Playlist")
@@ -168,6 +380,16 @@ class SoundCloudApiTests(unittest.TestCase):
     def test_extract_sc_hydration_returns_empty_on_invalid_html(self):
         self.assertEqual(_extract_sc_hydration("<html></html>"), [])
 
+    def test_is_soundcloud_set_url_matches_sets_and_playlists_only(self):
+        self.assertTrue(_is_soundcloud_set_url("https://soundcloud.com/a/sets/demo"))
+        self.assertTrue(_is_soundcloud_set_url("https://soundcloud.com/a/sets/demo/s-secret?si=1"))
+        self.assertTrue(_is_soundcloud_set_url("https://soundcloud.com/a/sets"))
+        self.assertTrue(_is_soundcloud_set_url("https://soundcloud.com/a/playlists/"))
+        self.assertTrue(_is_soundcloud_set_url("soundcloud:set:123"))
+        self.assertFalse(_is_soundcloud_set_url("https://soundcloud.com/a/track?in=owner/sets/demo"))
+        self.assertFalse(_is_soundcloud_set_url("https://soundcloud.com/a/setsuna"))
+        self.assertFalse(_is_soundcloud_set_url("https://open.spotify.com/playlist/abc"))
+
     def test_extract_sc_client_id_from_hydration(self):
         hydration = [{"hydratable": "apiClient", "data": {"id": "client-1"}}]
         self.assertEqual(_extract_sc_client_id(hydration), "client-1")
@@ -1,5 +1,7 @@
+import tempfile
 import unittest
 import importlib.util
+from unittest.mock import patch
 
 
 REQUESTS_AVAILABLE = importlib.util.find_spec("requests") is not None
@@ -17,11 +19,273 @@ class SpotifyApiTests(unittest.TestCase):
         pid = SpotifyClient.extract_playlist_id("spotify:playlist:37i9dQZF1DXcBWIGoYBM5M")
         self.assertEqual(pid, "37i9dQZF1DXcBWIGoYBM5M")
 
+    @unittest.skipUnless(REQUESTS_AVAILABLE, "requests is not installed in this environment")
+    def test_extract_playlist_id_stops_at_query_string(self):
+        from spotify_api import SpotifyClient
+        pid = SpotifyClient.extract_playlist_id("https://open.spotify.com/playlist/37i9dQZF1DXcBWIGoYBM5M?si=abc")
+        self.assertEqual(pid, "37i9dQZF1DXcBWIGoYBM5M")
+
     @unittest.skipUnless(REQUESTS_AVAILABLE, "requests is not installed in this environment")
     def test_extract_playlist_id_invalid(self):
         from spotify_api import SpotifyClient
         self.assertIsNone(SpotifyClient.extract_playlist_id("https://example.com/not-spotify"))
 
+    @unittest.skipUnless(REQUESTS_AVAILABLE, "requests is not installed in this environment")
+    def test_shared_session_retries_429_and_honors_retry_after(self):
+        from spotify_api import _SESSION
+        retry = _SESSION.get_adapter("https://api.spotify.com/v1").max_retries
+        self.assertIn(429, retry.status_forcelist)
+        self.assertTrue(retry.respect_retry_after_header)
+        self.assertIn("GET", retry.allowed_methods)
+        self.assertNotIn("POST", retry.allowed_methods)
+
+    @unittest.skipUnless(REQUESTS_AVAILABLE, "requests is not installed in this environment")
+    def test_post_session_retries_only_429(self):
+        from spotify_api import _POST_SESSION
+        retry = _POST_SESSION.get_adapter("https://api.spotify.com/v1").max_retries
+        self.assertEqual(tuple(retry.status_forcelist), (429,))
+        self.assertTrue(retry.respect_retry_after_header)
+        self.assertIn("POST", retry.allowed_methods)
+        self.assertEqual(retry.read, 0)
+        self.assertFalse(retry.is_retry("POST", 503))
+        self.assertTrue(retry.is_retry("POST", 429))
+
+    @unittest.skipUnless(REQUESTS_AVAILABLE, "requests is not installed in this environment")
+    def test_get_reuses_shared_session_across_pages(self):
+        from spotify_api import SpotifyClient
+
+        class FakeResponse:
+            status_code = 200
+            content = b'{"items": []}'
+
+            def raise_for_status(self):
+                pass
+
+        client = SpotifyClient(lambda: "token")
+        with patch("spotify_api._SESSION.get", return_value=FakeResponse()) as get_mock, patch(
+            "requests.get"
+        ) as bare_get:
+            client._get("https://api.spotify.com/v1/a")
+            client._get("https://api.spotify.com/v1/b")
+
+        self.assertEqual(get_mock.call_count, 2)
+        bare_get.assert_not_called()
+        self.assertEqual(get_mock.call_args.kwargs["headers"], {"Authorization": "Bearer token"})
+
+    @unittest.skipUnless(REQUESTS_AVAILABLE, "requests is not installed in this environment")
+    def test_parse_spotify_id_from_url_and_uri(self):
+        from spotify_api import SpotifyClient
+        client = SpotifyClient(lambda: "token")
+        self.assertEqual(client._parse_spotify_id("https://open.spotify.com/album/abc123?si=x"), ("album", "abc123"))
+        self.assertEqual(client._parse_spotify_id("spotify:track:XYZ"), ("track", "XYZ"))
+        self.assertEqual(client._parse_spotify_id(None), (None, None))
+
+    @unittest.skipUnless(REQUESTS_AVAILABLE, "requests is not installed in this environment")
+    def test_playlist_tracks_fetches_remaining_pages_by_offset_in_order(self):
+        from spotify_api import SpotifyClient
+
+        def fake_get(url, params=None):
+            offset = (params or {}).get("offset", 0)
+            items = [
+                {"track": {"id": f"t{i}", "name": f"Track {i}", "artists": [{"name": "A"}]}}
+                for i in range(offset, min(offset + 100, 250))
+            ]
+            return {"items": items, "next": "more" if offset + 100 < 250 else None, "total": 250}
+
+        client = SpotifyClient(lambda: "token")
+        with patch.object(client, "_get", side_effect=fake_get) as get_mock:
+            tracks = client.playlist_tracks("pid")
+
+        self.assertEqual(get_mock.call_count, 3)
+        self.assertEqual(len(tracks), 250)
+        self.assertEqual([t["id"] for t in tracks], [f"t{i}" for i in range(250)])
+
+    @unittest.skipUnless(REQUESTS_AVAILABLE, "requests is not installed in this environment")
+    def test_fetch_playlist_tracks_requests_all_pages_at_once_from_meta_total(self):
+        from spotify_api import SpotifyClient
+        offsets = []
+
+        def fake_get(url, params=None):
+            if not url.endswith("/tracks"):
+                self.assertIn("tracks.total", params["fields"])
+                return {"name": "Mix", "tracks": {"total": 150}}
+            offsets.append(params["offset"])
+            items = [{"track": {"id": f"t{i}"}} for i in range(params["offset"], min(params["offset"] + 100, 150))]
+            return {"items": items, "next": None}
+
+        client = SpotifyClient(lambda: "token")
+        with patch.object(client, "_get", side_effect=fake_get):
+            tracks, name = client.fetch_playlist_tracks("pid")
+
+        self.assertEqual(name, "Mix")
+        self.assertEqual(sorted(offsets), [0, 100])
+        self.assertEqual([t["id"] for t in tracks], [f"t{i}" for i in range(150)])
+
+    @unittest.skipUnless(REQUESTS_AVAILABLE, "requests is not installed in this environment")
+    def test_playlist_tracks_skips_local_and_missing_tracks(self):
+        from spotify_api import SpotifyClient
+        kept = {"id": "t1", "name": "Song", "artists": [{"name": "A"}], "album": {"name": "LP"}, "duration_ms": 1}
+        page = {"items": [{"track": kept}, {"track": None}, {"track": {"name": "Local", "is_local": True}}], "next": None}
+
+        client = SpotifyClient(lambda: "token")
+        with patch.object(client, "_get", return_value=page):
+            tracks = client.playlist_tracks("pid")
+
+        self.assertEqual(tracks, [kept])
+
+    @unittest.skipUnless(REQUESTS_AVAILABLE, "requests is not installed in this environment")
+    def test_album_tracks_fetches_remaining_pages_by_offset_in_order(self):
+        from spotify_api import SpotifyClient
+
+        def fake_get(url, params=None):
+            if not url.endswith("/tracks"):
+                return {"name": "LP", "artists": [{"name": "Band"}]}
+            offset = (params or {}).get("offset", 0)
+            items = [{"id": f"t{i}", "name": f"Track {i}"} for i in range(offset, min(offset + 50, 120))]
+            return {"items": items, "next": "more" if offset + 50 < 120 else None, "total": 120}
+
+        client = SpotifyClient(lambda: "token")
+        with patch.object(client, "_get", side_effect=fake_get) as get_mock:
+            tracks = client.album_tracks("aid")
+
+        self.assertEqual(get_mock.call_count, 4)
+        self.assertEqual([t["id"] for t in tracks], [f"t{i}" for i in range(120)])
+        self.assertEqual(tracks[0]["album"], {"name": "LP"})
+        self.assertEqual(tracks[0]["artists"], [{"name": "Band"}])
+
+    @unittest.skipUnless(REQUESTS_AVAILABLE, "requests is not installed in this environment")
+    def test_fetch_playlist_reuses_cached_tracks_for_same_snapshot(self):
+        from spotify_api import SpotifyClient
+        snapshot = {"id": "snap-1"}
+        tracks = [{"id": "t1", "name": "Track", "artists": [{"name": "A"}], "album": {"name": "Al"}, "duration_ms": 1000}]
+
+        def fake_get(url, params=None):
+            return {"name": "Mix", "snapshot_id": snapshot["id"]}
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            client = SpotifyClient(lambda: "token", cache_dir=cache_dir)
+            with patch.object(client, "_get", side_effect=fake_get), patch.object(
+                client, "playlist_tracks", return_value=tracks
+            ) as tracks_mock:
+                first, _ = client.fetch_playlist("pid")
+                second, name = client.fetch_playlist("pid")
+                self.assertEqual(tracks_mock.call_count, 1)
+                snapshot["id"] = "snap-2"
+                client.fetch_playlist("pid")
+                self.assertEqual(tracks_mock.call_count, 2)
+
+        self.assertEqual(name, "Mix")
+        self.assertEqual(first, second)
+        self.assertEqual(second[0]["Track Name"], "Track")
+
+    @unittest.skipUnless(REQUESTS_AVAILABLE, "requests is not installed in this environment")
+    def test_fetch_playlist_drops_foreign_schema_and_prunes_expired_files(self):
+        import json
+        import os
+        import time
+        import spotify_api
+        from spotify_api import SpotifyClient
+        tracks = [{"id": "t1", "name": "Track", "artists": [{"name": "A"}], "album": {"name": "Al"}, "duration_ms": 1000}]
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            path = os.path.join(cache_dir, "playlist_pid.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"schema": "0:old", "snapshot_id": "snap-1", "saved_at": time.time(), "tracks": []}, f)
+            expired = os.path.join(cache_dir, "playlist_gone.json")
+            open(expired, "w").close()
+            old = time.time() - spotify_api._PLAYLIST_CACHE_TTL_S - 60
+            os.utime(expired, (old, old))
+
+            client = SpotifyClient(lambda: "token", cache_dir=cache_dir)
+            with patch.object(client, "_get", return_value={"name": "Mix", "snapshot_id": "snap-1"}), patch.object(
+                client, "playlist_tracks", return_value=tracks
+            ) as tracks_mock:
+                rows, _ = client.fetch_playlist("pid")
+
+            self.assertEqual(tracks_mock.call_count, 1)
+            self.assertEqual(rows[0]["Track Name"], "Track")
+            self.assertFalse(os.path.exists(expired))
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(json.load(f)["schema"], spotify_api._PLAYLIST_CACHE_SCHEMA)
+
+    @unittest.skipUnless(REQUESTS_AVAILABLE, "requests is not installed in this environment")
+    def test_tracks_batches_ids_by_50_and_keeps_order(self):
+        from spotify_api import SpotifyClient
+
+        def fake_get(url, params=None):
+            return {"tracks": [{"id": i} for i in params["ids"].split(",")]}
+
+        ids = [f"id{i}" for i in range(120)]
+        client = SpotifyClient(lambda: "token")
+        with patch.object(client, "_get", side_effect=fake_get) as get_mock:
+            tracks = client.tracks(ids)
+
+        self.assertEqual(get_mock.call_count, 3)
+        self.assertEqual([t["id"] for t in tracks], ids)
+
+    @unittest.skipUnless(REQUESTS_AVAILABLE, "requests is not installed in this environment")
+    def test_tracks_looks_up_duplicate_ids_once(self):
+        from spotify_api import SpotifyClient
+        requested = []
+
+        def fake_get(url, params=None):
+            requested.extend(params["ids"].split(","))
+            return {"tracks": [{"id": i} for i in params["ids"].split(",")]}
+
+        client = SpotifyClient(lambda: "token")
+        with patch.object(client, "_get", side_effect=fake_get):
+            tracks = client.tracks(["a", "b", "a", "c", "b"])
+
+        self.assertEqual(requested, ["a", "b", "c"])
+        self.assertEqual([t["id"] for t in tracks], ["a", "b", "a", "c", "b"])
+
+    @unittest.skipUnless(REQUESTS_AVAILABLE, "requests is not installed in this environment")
+    def test_to_csv_rows_keys_follow_csv_fields(self):
+        from spotify_api import CSV_FIELDS, SpotifyClient
+        track = {"name": "Song", "artists": [{"name": "A"}, {"name": "B"}], "album": {"name": "LP"}, "duration_ms": 1000}
+
+        rows, name = SpotifyClient(lambda: "token").to_csv_rows([track, None], "Mix")
+
+        self.assertEqual(name, "Mix")
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(tuple(rows[0]), CSV_FIELDS)
+        self.assertEqual(tuple(rows[0].values()), ("Song", "A, B", "LP", 1000))
+
+    @unittest.skipUnless(REQUESTS_AVAILABLE, "requests is not installed in this environment")
+    def test_write_csv_streams_tuples_under_csv_fields_header(self):
+        import csv
+        import io
+        from spotify_api import CSV_FIELDS, SpotifyClient
+        tracks = [
+            {"name": "Song", "artists": [{"name": "A"}, {"name": None}], "album": {"name": "LP"}, "duration_ms": 1000},
+            None,
+            {"name": "Other", "artists": []},
+        ]
+
+        buf = io.StringIO()
+        count = SpotifyClient(lambda: "token").write_csv(tracks, buf)
+
+        self.assertEqual(count, 2)
+        self.assertEqual(list(csv.reader(io.StringIO(buf.getvalue()))), [
+            list(CSV_FIELDS),
+            ["Song", "A", "LP", "1000"],
+            ["Other", "Unknown", "", ""],
+        ])
+
+    @unittest.skipUnless(REQUESTS_AVAILABLE, "requests is not installed in this environment")
+    def test_shared_client_is_reused_per_client_id(self):
+        from spotify_api import SpotifyClient, shared_client
+        shared_client.cache_clear()
+        try:
+            # no keychain access: PKCEAuth reads the stored refresh token on init
+            with patch("token_store.keyring", None):
+                first = shared_client("id-a")
+                self.assertIsInstance(first, SpotifyClient)
+                self.assertIs(shared_client("id-a"), first)
+                self.assertIsNot(shared_client("id-b"), first)
+        finally:
+            shared_client.cache_clear()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -33,14 +33,133 @@ class SpotifyAuthTests(unittest.TestCase):
         self.assertIsNone(auth._refresh_token)
         auth_mock.assert_called_once()
 
+    @unittest.skipUnless(REQUESTS_AVAILABLE, "requests is not installed in this environment")
+    def test_concurrent_get_token_refreshes_once(self):
+        import threading
+        import time
+        from spotify_auth import PKCEAuth
+        auth = PKCEAuth(client_id="dummy", refresh_token_store=_Store(token="refresh"))
+        calls = []
+
+        def _refresh_side_effect():
+            calls.append(1)
+            time.sleep(0.05)
+            auth._set_tokens({"access_token": "access", "expires_in": 3600})
+
+        with patch.object(auth, "_refresh", side_effect=_refresh_side_effect):
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(auth.get_token())) for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["access"] * 4)
+
+    @unittest.skipUnless(REQUESTS_AVAILABLE, "requests is not installed in this environment")
+    def test_refresh_reuses_one_token_session(self):
+        from spotify_auth import PKCEAuth
+        auth = PKCEAuth(client_id="dummy", refresh_token_store=_Store(token="refresh"))
+
+        class FakeResponse:
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return {"access_token": "access", "expires_in": 3600}
+
+        session = auth._token_session()
+        with patch.object(session, "post", return_value=FakeResponse()) as post_mock:
+            auth._refresh()
+            auth._refresh()
+
+        self.assertIs(auth._token_session(), session)
+        self.assertEqual(post_mock.call_count, 2)
+        self.assertEqual(post_mock.call_args.kwargs["data"]["refresh_token"], "refresh")
+
+    @unittest.skipUnless(REQUESTS_AVAILABLE, "requests is not installed in this environment")
+    def test_token_session_retries_transient_5xx_on_post(self):
+        from spotify_auth import PKCEAuth, SPOTIFY_TOKEN_URL
+        auth = PKCEAuth(client_id="dummy")
+        retry = auth._token_session().get_adapter(SPOTIFY_TOKEN_URL).max_retries
+        self.assertTrue(retry.is_retry("POST", 503))
+        self.assertFalse(retry.is_retry("POST", 400))
+        self.assertFalse(retry.is_retry("POST", 429, has_retry_after=True))
+        self.assertEqual(retry.read, 0)
+
+    @unittest.skipUnless(REQUESTS_AVAILABLE, "requests is not installed in this environment")
+    def test_authorize_serves_callback_after_unrelated_requests(self):
+        import socket
+        import threading
+        import urllib.error
+        import urllib.request
+        from spotify_auth import PKCEAuth
+
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        auth = PKCEAuth(client_id="dummy", redirect_uri=f"http://127.0.0.1:{port}/callback", auth_timeout_sec=15)
+
+        def browser(_url):
+            def visit():
+                for path in ("/favicon.ico", "/callback?code=abc"):
+                    try:
+                        urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=5).read()
+                    except urllib.error.HTTPError:
+                        pass
+            threading.Thread(target=visit, daemon=True).start()
+
+        class FakeResponse:
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return {"access_token": "access", "refresh_token": "r", "expires_in": 3600}
+
+        with patch("webbrowser.open", side_effect=browser), patch.object(
+            auth._token_session(), "post", return_value=FakeResponse()
+        ) as post_mock:
+            auth._authorize()
+
+        self.assertEqual(post_mock.call_args.kwargs["data"]["code"], "abc")
+        self.assertEqual(auth._access_token, "access")
+
+    @unittest.skipUnless(REQUESTS_AVAILABLE, "requests is not installed in this environment")
+    def test_verifier_challenge_is_s256_of_verifier(self):
+        import base64
+        import hashlib
+        from spotify_auth import PKCEAuth
+        verifier, challenge = PKCEAuth(client_id="dummy")._make_verifier_challenge()
+
+        expected = base64.urlsafe_b64encode(hashlib.sha256(verifier.encode("ascii")).digest()).rstrip(b"=").decode()
+        self.assertEqual(challenge, expected)
+        self.assertTrue(43 <= len(verifier) <= 128)
+        self.assertNotIn("=", verifier)
+
     def test_authorize_reports_callback_port_start_failure(self):
         from spotify_auth import PKCEAuth
         auth = PKCEAuth(client_id="dummy", redirect_uri="http://127.0.0.1:9999/callback")
 
-        with patch("spotify_auth.HTTPServer", side_effect=OSError("address in use")):
+        with patch("http.server.HTTPServer", side_effect=OSError("address in use")):
             with self.assertRaisesRegex(RuntimeError, "callback server could not start"):
                 auth._authorize()
 
+    def test_import_defers_browser_server_and_http_stack(self):
+        import subprocess
+        import sys
+        from pathlib import Path
+        code = (
+            "import sys, spotify_auth; "
+            "print(','.join(m for m in ('requests', 'webbrowser', 'http.server') if m in sys.modules))"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", code], cwd=Path(__file__).resolve().parents[1],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+
+        self.assertEqual(out, "")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,42 @@
+import csv
+import os
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from utils import json_loads, write_temp_csv
+
+
+class WriteTempCsvTests(unittest.TestCase):
+    def _read_back(self, rows, fieldnames):
+        path = write_temp_csv(rows, fieldnames, "test_utils_")
+        self.addCleanup(os.remove, path)
+        with open(path, newline="", encoding="utf-8") as f:
+            return list(csv.reader(f))
+
+    def test_single_field_is_one_column(self):
+        out = self._read_back([{"url": "https://a"}, {"url": "https://b"}], ["url"])
+        self.assertEqual(out, [["url"], ["https://a"], ["https://b"]])
+
+    def test_missing_key_is_written_empty(self):
+        out = self._read_back(
+            [{"Track Name": "One", "Album": "X"}, {"Track Name": "Two"}],
+            ["Track Name", "Album"],
+        )
+        self.assertEqual(out, [["Track Name", "Album"], ["One", "X"], ["Two", ""]])
+
+
+class JsonLoadsTests(unittest.TestCase):
+    def test_falls_back_to_stdlib_json_without_orjson(self):
+        with patch("utils.orjson", None):
+            self.assertEqual(json_loads(b'{"a": [1, "\u00e9"]}'), {"a": [1, "\u00e9"]})
+            self.assertEqual(json_loads('{"a": null}'), {"a": None})
+
+    def test_uses_orjson_when_available(self):
+        fake = SimpleNamespace(loads=lambda data: ("orjson", data))
+        with patch("utils.orjson", fake):
+            self.assertEqual(json_loads(b"{}"), ("orjson", b"{}"))
+
+
+if __name__ == "__main__":
+    unittest.main()
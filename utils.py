@@ -1,11 +1,24 @@
 # utils.py
-import os
+import csv
+import json
+import os
 import platform
 import shutil
 import subprocess
 import sys
+import tempfile
 import tkinter as tk
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# The OS never changes while the app runs: decide it once for the helpers below.
+_SYSTEM = platform.system()
+_IS_WINDOWS = _SYSTEM == "Windows"
+_IS_DARWIN = _SYSTEM == "Darwin"
+
 YTDLP_COOKIE_BROWSERS = ("", "safari", "chrome", "firefox", "brave", "edge", "chromium", "opera", "vivaldi", "whale")
 
 
@@ -19,7 +32,7 @@ def find_ytdlp_cmd(resource_path_func=None) -> list[str]:
     - executable available on PATH,
     - installed Python module in the current interpreter.
     """
-    exe = "yt-dlp.exe" if platform.system() == "Windows" else "yt-dlp"
+    exe = "yt-dlp.exe" if _IS_WINDOWS else "yt-dlp"
     candidates: list[str] = []
     if resource_path_func:
         candidates.extend([
@@ -39,6 +52,36 @@ def find_ytdlp_cmd(resource_path_func=None) -> list[str]:
     return [sys.executable, "-m", "yt_dlp"]
 
 
+def json_loads(data):
+    """Parse JSON from str/bytes with orjson when installed, else the stdlib."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Temp CSVs are written in one go; a 64 KiB buffer keeps a 1000-row
+# playlist to a couple of write() calls instead of one per 8 KiB.
+CSV_WRITE_BUFFER = 1 << 16
+
+
+def open_temp_csv(prefix: str):
+    """Open a kept (delete=False) temp .csv for writing, as the csv module expects."""
+    return tempfile.NamedTemporaryFile(
+        "w", prefix=prefix, suffix=".csv", newline="", encoding="utf-8",
+        buffering=CSV_WRITE_BUFFER, delete=False,
+    )
+
+
+def write_temp_csv(rows, fieldnames, prefix: str) -> str:
+    """Write row dicts under a fieldnames header to a new temp CSV; returns its path."""
+    with open_temp_csv(prefix) as f:
+        writer = csv.writer(f)
+        writer.writerow(fieldnames)
+        # Keys are optional in yt-dlp/Spotify data: write "" like DictWriter did.
+        writer.writerows(tuple(r.get(k, "") for k in fieldnames) for r in rows)
+    return f.name
+
+
 def build_ytdlp_cookie_args(config: dict | None) -> list[str]:
     """
     Build yt-dlp cookie/auth arguments from config.
@@ -58,6 +101,22 @@ def build_ytdlp_cookie_args(config: dict | None) -> list[str]:
     return []
 
 
+def build_ytdlp_cookie_opts(config: dict | None) -> dict:
+    """
+    Same cookie/auth choice as build_ytdlp_cookie_args, as YoutubeDL params
+    for in-process extraction.
+    """
+    cfg = config or {}
+    browser = str(cfg.get("cookies_from_browser") or "").strip().lower()
+    profile = str(cfg.get("cookies_browser_profile") or "").strip()
+    if browser:
+        return {"cookiesfrombrowser": (browser, profile or None, None, None)}
+    cookies_path = str(cfg.get("cookies_path") or "").strip()
+    if cookies_path:
+        return {"cookiefile": cookies_path}
+    return {}
+
+
 # -----------------------------
 # UI helpers
 # -----------------------------
@@ -66,16 +125,22 @@ class Tooltip:
         self.widget = widget
         self.text = text
         self.tip = None
+        self._has_insert = True  # False once the widget proved to have no 'insert' index
         widget.bind('<Enter>', self._show)
         widget.bind('<Leave>', self._hide)
 
     def _show(self, _):
         if self.tip or not self.text:
             return
-        try:
-            x, y, _cx, cy = self.widget.bbox('insert')
-        except Exception:
-            x, y, cy = 0, 0, 0
+        x = y = cy = 0
+        if self._has_insert:
+            try:
+                x, y, _cx, cy = self.widget.bbox('insert')
+            except tk.TclError:
+                # Buttons/labels have no insert cursor: stop asking Tk on every hover.
+                self._has_insert = False
+            except TypeError:
+                pass  # None: insert cursor scrolled out of view, ask again next time
         x += self.widget.winfo_rootx() + 24
         y += cy + self.widget.winfo_rooty() + 24
         self.tip = tk.Toplevel(self.widget)
@@ -109,10 +174,9 @@ def open_folder(path: str | None) -> bool:
     if not path or not os.path.isdir(path):
         return False
     try:
-        system = platform.system()
-        if system == "Windows":
+        if _IS_WINDOWS:
             os.startfile(path)  # noqa: P204
-        elif system == "Darwin":
+        elif _IS_DARWIN:
             subprocess.run(["open", path])
         else:
             subprocess.run(["xdg-open", path])
@@ -121,15 +185,17 @@ def open_folder(path: str | None) -> bool:
         return False
 
 
-def open_path(path: str | None) -> bool:
-    """Open a file or folder with the default OS handler."""
-    if not path or not os.path.exists(path):
+def open_path(path: str | None, trust: bool = False) -> bool:
+    """
+    Open a file or folder with the default OS handler.
+    trust=True skips the exists() stat when the caller has just checked the path.
+    """
+    if not path or not (trust or os.path.exists(path)):
         return False
     try:
-        system = platform.system()
-        if system == "Windows":
+        if _IS_WINDOWS:
             os.startfile(path)  # noqa: P204
-        elif system == "Darwin":
+        elif _IS_DARWIN:
             subprocess.run(["open", path])
         else:
             subprocess.run(["xdg-open", path])
@@ -141,25 +207,25 @@ def open_path(path: str | None) -> bool:
 # -----------------------------
 # Subprocess helpers (NO console windows)
 # -----------------------------
-def _win_no_window_kwargs():
-    """Return kwargs preventing console popups on Windows."""
-    if platform.system() == "Windows":
-        si = subprocess.STARTUPINFO()
-        si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-        return {"startupinfo": si, "creationflags": subprocess.CREATE_NO_WINDOW}
-    return {}
+# subprocess kwargs hiding the console window on Windows (empty elsewhere), built
+# once for every yt-dlp/ffmpeg spawn. Popen copies startupinfo before using it,
+# so one instance can be shared. Unpack it (**NO_WINDOW_KWARGS), never mutate it.
+if _IS_WINDOWS:
+    _WIN_STARTUPINFO = subprocess.STARTUPINFO()
+    _WIN_STARTUPINFO.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    NO_WINDOW_KWARGS = {"startupinfo": _WIN_STARTUPINFO, "creationflags": subprocess.CREATE_NO_WINDOW}
+else:
+    NO_WINDOW_KWARGS = {}
 
 
 def run_quiet(cmd, *, text=False, capture_output=False, **kwargs) -> subprocess.CompletedProcess:
     """
     Wrapper around subprocess.run that never pops a console on Windows.
     """
-    kw = _win_no_window_kwargs()
     if capture_output:
         kwargs.setdefault("stdout", subprocess.PIPE)
         kwargs.setdefault("stderr", subprocess.PIPE)
-    kw.update(kwargs)
-    return subprocess.run(cmd, text=text, **kw)
+    return subprocess.run(cmd, text=text, **{**NO_WINDOW_KWARGS, **kwargs})
 
 
 def popen_quiet(cmd, **kwargs) -> subprocess.Popen:
@@ -167,8 +233,6 @@ def popen_quiet(cmd, **kwargs) -> subprocess.Popen:
     Wrapper around subprocess.Popen that never opens a console on Windows,
     and pipes stdout/stderr by default (handy for progress parsing).
     """
-    kw = _win_no_window_kwargs()
     kwargs.setdefault("stdout", subprocess.PIPE)
     kwargs.setdefault("stderr", subprocess.PIPE)
-    kw.update(kwargs)
-    return subprocess.Popen(cmd, **kw)
+    return subprocess.Popen(cmd, **{**NO_WINDOW_KWARGS, **kwargs})